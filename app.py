@@ -338,8 +338,8 @@ async def close_all_positions(payload: dict = Depends(verify_token)):
     if not trader:
         raise HTTPException(status_code=400, detail="API key bulunamadı")
     
-    results = trader.close_all_positions()
-    return {"results": results}
+    ret = trader.close_all_positions()
+    return {"results": ret['results'] if ret['success'] else [ret]}
 
 # ==================== AUTO TRADER ====================
 import threading
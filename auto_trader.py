@@ -2,6 +2,8 @@
 KriptoBot - Otomatik Trading Sistemi
 Gemini AI ile analiz, Bybit API ile işlem
 """
+import asyncio
+import threading
 import time
 import json
 import schedule
@@ -29,6 +31,13 @@ class AutoTrader:
         self.trading_pairs = config.TRADING_PAIRS[:20]  # İlk 20 parite
         self.max_open_positions = 5  # Maksimum açık pozisyon
         self.last_analysis = {}
+        
+        # Analiz zamanlama durumu (tick() her dakika günceller)
+        self._last_analysis_time = time.time()
+        self._had_position = False
+        
+        # Saatlik cron ve tick() analizleri üst üste binmesin (çift pozisyon açılmasın)
+        self._analysis_lock = threading.Lock()
     
     def get_market_data(self, symbol: str) -> dict:
         """Piyasa verilerini al (Public API - imza gerektirmez)"""
@@ -219,7 +228,12 @@ YANIT FORMATI (sadece JSON, başka bir şey yazma):
             time.sleep(1)
     
     def run_analysis(self):
-        """Ana analiz döngüsü"""
+        """Ana analiz döngüsü (aynı anda tek analiz - diğer çağrı öncekinin bitmesini bekler)"""
+        with self._analysis_lock:
+            self._run_analysis()
+    
+    def _run_analysis(self):
+        """Piyasa verisi -> Gemini -> sinyal yürütme (run_analysis kilidi altında çalışır)"""
         logger.info("=" * 50)
         logger.info(f"🔍 ANALİZ BAŞLADI - {datetime.now().strftime('%Y-%m-%d %H:%M')}")
         logger.info("=" * 50)
@@ -261,8 +275,8 @@ YANIT FORMATI (sadece JSON, başka bir şey yazma):
         positions = self.trader.get_all_positions()
         return len(positions) > 0
     
-    def start(self):
-        """Botu başlat"""
+    async def startup(self):
+        """Başlangıç: bakiye kontrolü ve ilk analiz"""
         logger.info("""
 ╔══════════════════════════════════════════════════════════╗
 ║          🤖 KRİPTOBOT - OTOMATİK TRADER                 ║
@@ -274,48 +288,55 @@ YANIT FORMATI (sadece JSON, başka bir şey yazma):
 """)
         
         # Bakiye kontrol
-        balance = self.trader.get_available_balance()
+        balance = await asyncio.to_thread(self.trader.get_available_balance)
         logger.info(f"💰 Başlangıç Bakiyesi: {balance} USDT")
         logger.info(f"📊 İzlenen Parite: {len(self.trading_pairs)}")
         
         # İlk analizi hemen yap
         logger.info("\n🚀 İlk analiz başlatılıyor...\n")
-        self.run_analysis()
+        await asyncio.to_thread(self.run_analysis)
+        self._last_analysis_time = time.time()
+    
+    async def tick(self):
+        """Dakikalık kontrol: pozisyon yoksa 15 dakikada bir, kapanınca hemen analiz"""
+        has_position_now = await asyncio.to_thread(self.has_open_positions)
+        
+        # Açık pozisyon yoksa her 15 dakikada analiz
+        if not has_position_now:
+            # Pozisyon yeni kapandıysa hemen analiz yap
+            if self._had_position:
+                logger.info("\n🔄 Pozisyon kapandı - Hemen yeni analiz başlatılıyor...")
+                await asyncio.to_thread(self.run_analysis)
+                self._last_analysis_time = time.time()
+            # Normal 15 dakika kontrolü
+            elif time.time() - self._last_analysis_time >= 900:
+                logger.info("\n⏰ 15 dakika geçti - Analiz başlatılıyor...")
+                await asyncio.to_thread(self.run_analysis)
+                self._last_analysis_time = time.time()
+        
+        self._had_position = has_position_now
+    
+    async def start(self):
+        """Botu tek başına çalıştır (bloklayan API/Gemini çağrıları thread'de çalışır)"""
+        await self.startup()
         
         # Her saat başı analiz
         schedule.every().hour.at(":00").do(self.run_analysis)
         
-        # Son analiz zamanı
-        last_analysis_time = time.time()
-        had_position = False
-        
         # Döngü
         logger.info("⏳ Zamanlayıcı aktif")
         while True:
-            schedule.run_pending()
-            
-            has_position_now = self.has_open_positions()
-            
-            # Açık pozisyon yoksa her 15 dakikada analiz
-            if not has_position_now:
-                # Pozisyon yeni kapandıysa hemen analiz yap
-                if had_position:
-                    logger.info("\n🔄 Pozisyon kapandı - Hemen yeni analiz başlatılıyor...")
-                    self.run_analysis()
-                    last_analysis_time = time.time()
-                # Normal 15 dakika kontrolü
-                elif time.time() - last_analysis_time >= 900:
-                    logger.info("\n⏰ 15 dakika geçti - Analiz başlatılıyor...")
-                    self.run_analysis()
-                    last_analysis_time = time.time()
-            
-            had_position = has_position_now
-            time.sleep(60)
+            await asyncio.to_thread(schedule.run_pending)
+            await self.tick()
+            await asyncio.sleep(60)
 
 
 def main():
     trader = AutoTrader()
-    trader.start()
+    try:
+        asyncio.run(trader.start())
+    except KeyboardInterrupt:
+        logger.info("⏹️ Auto trader durduruldu")
 
 
 if __name__ == "__main__":
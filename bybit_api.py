@@ -10,6 +10,10 @@ import requests
 from typing import Dict, Optional, List
 from loguru import logger
 import config
+from utils import TokenBucket
+
+# Tüm Bybit istekleri için ortak limit (saniyede 10 istek, 429 cezasının altında)
+_BUCKET = TokenBucket(rate=10, capacity=10)
 
 
 class BybitAPI:
@@ -32,6 +36,7 @@ class BybitAPI:
             hashlib.sha256
         ).hexdigest()
     
+    @_BUCKET.limit
     def _request(self, method: str, endpoint: str, params: Dict = None) -> Dict:
         """Make authenticated request to Bybit V5 API"""
         if params is None:
@@ -94,6 +99,10 @@ class BybitAPI:
         params = {'category': category, 'symbol': symbol}
         return self._request('GET', '/v5/market/tickers', params)
     
+    def get_tickers(self, category: str = 'linear') -> Dict:
+        """Kategorideki tüm coinlerin fiyat bilgisi (tek istek)"""
+        return self._request('GET', '/v5/market/tickers', {'category': category})
+    
     def get_kline(self, symbol: str, interval: str = '60', limit: int = 100, 
                   category: str = 'linear') -> Dict:
         """Mum verileri al - interval: 1,3,5,15,30,60,120,240,360,720,D,W,M"""
@@ -395,31 +404,40 @@ class BybitTrader:
             take_profit=str(take_profit) if take_profit else None
         )
     
-    def close_all_positions(self, symbol: str = None) -> List[Dict]:
-        """Tüm pozisyonları kapat"""
+    def close_all_positions(self, symbol: str = None) -> Dict:
+        """
+        Tüm pozisyonları kapat (pozisyonlar tek istekle alınır)
+        
+        Returns:
+            {'success', 'positions_before': kapatmadan önceki açık pozisyonlar,
+             'results': sembol başına kapatma sonuçları}
+        """
         results = []
         positions = self.api.get_positions(symbol=symbol)
         
         if not positions['success']:
-            return [positions]
-        
-        for pos in positions['data'].get('list', []):
-            if float(pos.get('size', 0)) > 0:
-                close_side = 'Sell' if pos['side'] == 'Buy' else 'Buy'
-                result = self.api.place_order(
-                    symbol=pos['symbol'],
-                    side=close_side,
-                    qty=pos['size'],
-                    order_type='Market'
-                )
-                results.append({
-                    'symbol': pos['symbol'],
-                    'closed_size': pos['size'],
-                    'result': result
-                })
-                logger.info(f"Pozisyon kapatıldı: {pos['symbol']} {pos['size']}")
-        
-        return results
+            return {'success': False, 'error': positions.get('error'),
+                    'positions_before': [], 'results': []}
+        
+        open_positions = [pos for pos in positions['data'].get('list', [])
+                          if float(pos.get('size', 0)) > 0]
+        
+        for pos in open_positions:
+            close_side = 'Sell' if pos['side'] == 'Buy' else 'Buy'
+            result = self.api.place_order(
+                symbol=pos['symbol'],
+                side=close_side,
+                qty=pos['size'],
+                order_type='Market'
+            )
+            results.append({
+                'symbol': pos['symbol'],
+                'closed_size': pos['size'],
+                'result': result
+            })
+            logger.info(f"Pozisyon kapatıldı: {pos['symbol']} {pos['size']}")
+        
+        return {'success': True, 'positions_before': open_positions, 'results': results}
     
     def update_stop_loss(self, symbol: str, stop_loss: float) -> Dict:
         """Stop loss güncelle"""
@@ -431,12 +449,14 @@ class BybitTrader:
     
     def get_all_prices(self) -> Dict[str, float]:
         """Tüm paritelerin fiyatlarını al"""
-        prices = {}
-        for symbol in self.trading_pairs:
-            price = self.get_current_price(symbol)
-            if price > 0:
-                prices[symbol] = price
-        return prices
+        # Parite başına istek yerine tek tickers çağrısı, sonra filtrele
+        result = self.api.get_tickers()
+        if not result['success']:
+            return {}
+        last = {t['symbol']: float(t.get('lastPrice') or 0)
+                for t in result['data'].get('list', [])}
+        return {symbol: last[symbol] for symbol in self.trading_pairs
+                if last.get(symbol, 0) > 0}
     
     def get_all_positions(self) -> List[Dict]:
         """Tüm açık pozisyonları al"""
@@ -31,6 +31,9 @@ TELEGRAM_CHANNELS = [
     "BalinaSinyalleri",       # Balina Sinyalleri
 ]
 
+# Yeniden başlatmada tekrar işlenmesin diye görülen mesajların kalıcı kaydı (SQLite)
+TELEGRAM_DEDUP_DB = os.getenv("TELEGRAM_DEDUP_DB", "dedup.db")
+
 # ==================== GEMINI AI ====================
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 GEMINI_MODEL = "gemini-2.5-flash"
@@ -71,6 +74,13 @@ SIGNAL_CHECK_INTERVAL = 30      # Dakika - sinyal kontrolü
 GEMINI_ANALYSIS_INTERVAL = 60   # Dakika - Gemini analizi
 SCALPER_INTERVAL = 60           # Dakika - Scalper modu
 
+# Telegram sinyali bu güven aralığının dışındaysa Gemini doğrulaması atlanır
+GEMINI_SKIP_HIGH = 0.92         # Üstü: doğrudan R/R kontrolüne geçer
+GEMINI_SKIP_LOW = 0.35          # Altı: doğrudan reddedilir
+
+# Gemini analiz kayıtları
+SAVE_ALL_ANALYSES = False       # True: işleme dönüşmeyen (HOLD/düşük güven) analizler de kaydedilir
+
 # ==================== TEKNİK ANALİZ ====================
 # RSI Ayarları
 RSI_PERIOD = 14
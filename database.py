@@ -3,21 +3,60 @@ Supabase/PostgreSQL Veritabanı Modülü
 İşlem geçmişi, sinyal kayıtları ve bot durumu
 """
 import json
+import sys
+import threading
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
+import numpy as np
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from contextlib import contextmanager
 from loguru import logger
 import config
 
+# NUMERIC/DECIMAL kolonlar Decimal yerine doğrudan float döner (satır okunurken sürücüde dönüştürülür)
+_DEC2FLOAT = psycopg2.extensions.new_type(
+    psycopg2.extensions.DECIMAL.values,
+    'DEC2FLOAT',
+    lambda value, cur: float(value) if value is not None else None
+)
+psycopg2.extensions.register_type(_DEC2FLOAT)
+
+# Açık işlemlerin sayısal alanları (side: LONG=1, SHORT=-1, diğer=0)
+_OPEN_TRADE_DTYPE = np.dtype([
+    ('id', np.int64),
+    ('entry', np.float64),
+    ('tp', np.float64),
+    ('sl', np.float64),
+    ('volume', np.float64),
+    ('side', np.int8),
+])
+
+
+class DeferredWrites:
+    """
+    Database.transaction() bloğunda ertelenen yazmalar
+    Database ile aynı metod adları kullanılır; blok sonunda tek transaction'da uygulanır
+    """
+    
+    _OPS = frozenset({'update_trades_bulk', 'save_tp_record', 'close_trade'})
+    
+    def __init__(self):
+        self.ops: List[tuple] = []
+    
+    def __getattr__(self, name):
+        if name not in self._OPS:
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self.ops.append((name, args, kwargs))
+
 
 class Database:
     """PostgreSQL/Supabase Veritabanı Yöneticisi"""
     
     def __init__(self):
         self.connection_string = config.SUPABASE_URL
+        self._local = threading.local()  # transaction() sırasında thread'e ait aktif cursor
         self._init_tables()
     
     @contextmanager
@@ -37,6 +76,45 @@ class Database:
             if conn:
                 conn.close()
     
+    @contextmanager
+    def _cursor(self):
+        """Aktif toplu transaction varsa onun cursor'ı, yoksa yeni bağlantı"""
+        cur = getattr(self._local, 'cur', None)
+        if cur is not None:
+            yield cur
+            return
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                yield cur
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Yazmaları biriktir, blok sonunda tek bağlantı/commit ile uygula
+        Blok hata verse de o ana kadar ertelenenler yazılır (borsada gerçekleşmiş işlemler);
+        her yazma kendi SAVEPOINT'inde çalışır, hatalı olan loglanıp atlanır, diğerleri commit edilir
+        """
+        tx = DeferredWrites()
+        try:
+            yield tx
+        finally:
+            if tx.ops:
+                with self.get_connection() as conn:
+                    with conn.cursor() as cur:
+                        self._local.cur = cur
+                        try:
+                            for name, args, kwargs in tx.ops:
+                                cur.execute("SAVEPOINT deferred_op")
+                                try:
+                                    getattr(self, name)(*args, **kwargs)
+                                except Exception as e:
+                                    cur.execute("ROLLBACK TO SAVEPOINT deferred_op")
+                                    logger.error(f"Ertelenen yazma uygulanamadı: {name} {args} {kwargs}: {e}")
+                                else:
+                                    cur.execute("RELEASE SAVEPOINT deferred_op")
+                        finally:
+                            self._local.cur = None
+    
     def _init_tables(self):
         """Tabloları oluştur"""
         create_tables_sql = """
@@ -78,7 +156,9 @@ class Database:
             opened_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             closed_at TIMESTAMP,
             close_reason VARCHAR(50),
-            notes TEXT
+            notes TEXT,
+            cumulative_pct_closed DECIMAL(5, 2) DEFAULT 0,
+            tp_count INTEGER DEFAULT 0
         );
         
         -- TP kayıtları
@@ -143,6 +223,27 @@ class Database:
         CREATE INDEX IF NOT EXISTS idx_trades_coin ON trades(coin);
         CREATE INDEX IF NOT EXISTS idx_daily_perf_date ON daily_performance(date);
         CREATE INDEX IF NOT EXISTS idx_gemini_coin ON gemini_analyses(coin);
+        
+        -- Migrasyon: TP toplamları trades üzerinde tutulur (her tick'te tp_records taranmaz)
+        -- Kolonlar yoksa eklenir ve geriye dönük doldurma sadece o seferde çalışır
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = 'trades'
+                  AND column_name = 'tp_count'
+            ) THEN
+                ALTER TABLE trades ADD COLUMN IF NOT EXISTS cumulative_pct_closed DECIMAL(5, 2) DEFAULT 0;
+                ALTER TABLE trades ADD COLUMN tp_count INTEGER DEFAULT 0;
+                UPDATE trades t
+                SET cumulative_pct_closed = s.pct, tp_count = s.cnt
+                FROM (
+                    SELECT trade_id, SUM(percentage_closed) AS pct, COUNT(*) AS cnt
+                    FROM tp_records GROUP BY trade_id
+                ) s
+                WHERE t.id = s.trade_id AND t.status = 'OPEN';
+            END IF;
+        END $$;
         """
         
         try:
@@ -182,6 +283,39 @@ class Database:
                 logger.info(f"Sinyal kaydedildi: ID={signal_id}")
                 return signal_id
     
+    def save_signals_bulk(self, signals: List[Dict]) -> List[int]:
+        """Birden fazla sinyali tek INSERT ile kaydet, ID'leri aynı sırada döndür"""
+        if not signals:
+            return []
+        
+        sql = """
+        INSERT INTO signals (coin, side, entries, take_profits, stop_loss, 
+                            leverage, source, confidence, raw_message, status)
+        VALUES %s
+        RETURNING id
+        """
+        rows = [
+            (
+                s.get('coin'),
+                s.get('side'),
+                json.dumps(s.get('entries', [])),
+                json.dumps(s.get('take_profits', [])),
+                s.get('stop_loss'),
+                s.get('leverage', 20),
+                s.get('source'),
+                s.get('confidence'),
+                s.get('raw_message'),
+                s.get('status', 'PENDING')
+            )
+            for s in signals
+        ]
+        
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                signal_ids = [row[0] for row in execute_values(cur, sql, rows, fetch=True)]
+                logger.info(f"{len(signal_ids)} sinyal kaydedildi: ID={signal_ids}")
+                return signal_ids
+    
     def update_signal_status(self, signal_id: int, status: str, notes: str = None):
         """Sinyal durumunu güncelle"""
         sql = """
@@ -273,6 +407,24 @@ class Database:
             with conn.cursor() as cur:
                 cur.execute(sql, values)
     
+    def update_trades_bulk(self, rows: List[tuple]):
+        """
+        Birden fazla işlemin fiyat/PNL alanlarını tek UPDATE ile güncelle
+        rows: [(trade_id, current_price, pnl_percentage), ...]
+        """
+        if not rows:
+            return
+        
+        sql = """
+        UPDATE trades
+        SET current_price = v.cp, pnl_percentage = v.pnl
+        FROM (VALUES %s) AS v(id, cp, pnl)
+        WHERE trades.id = v.id
+        """
+        
+        with self._cursor() as cur:
+            execute_values(cur, sql, rows)
+    
     def close_trade(self, trade_id: int, pnl: float, pnl_percentage: float, 
                     reason: str = "MANUAL"):
         """İşlem kapat"""
@@ -283,9 +435,8 @@ class Database:
         WHERE id = %s
         """
         
-        with self.get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(sql, (pnl, pnl_percentage, reason, trade_id))
+        with self._cursor() as cur:
+            cur.execute(sql, (pnl, pnl_percentage, reason, trade_id))
         
         logger.info(f"İşlem kapatıldı: ID={trade_id}, PNL={pnl}, Reason={reason}")
     
@@ -300,7 +451,32 @@ class Database:
         with self.get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 cur.execute(sql)
-                return [dict(row) for row in cur.fetchall()]
+                return [self._with_symbol(dict(row)) for row in cur.fetchall()]
+    
+    def get_open_trades_array(self) -> Tuple[np.ndarray, List[Dict]]:
+        """
+        Açık işlemleri yapısal dizi olarak al (JIT döngüleri için)
+        
+        Returns:
+            (sayısal alanlar dizisi, aynı sıradaki trade dict'leri)
+        """
+        trades = self.get_open_trades()
+        arr = np.fromiter(
+            (
+                (
+                    t['id'],
+                    float(t['entry_price'] or 0),
+                    float(t.get('take_profit') or 0),
+                    float(t.get('stop_loss') or 0),
+                    float(t.get('volume') or 0),
+                    1 if t['side'] == 'LONG' else -1 if t['side'] == 'SHORT' else 0
+                )
+                for t in trades
+            ),
+            dtype=_OPEN_TRADE_DTYPE,
+            count=len(trades)
+        )
+        return arr, trades
     
     def get_trade_by_coin(self, coin: str) -> Optional[Dict]:
         """Coin'e göre açık işlem bul"""
@@ -315,23 +491,34 @@ class Database:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 cur.execute(sql, (coin,))
                 row = cur.fetchone()
-                return dict(row) if row else None
+                return self._with_symbol(dict(row)) if row else None
+    
+    @staticmethod
+    def _with_symbol(trade: Dict) -> Dict:
+        """İşleme LBank sembolünü bir kez ekle (BTC -> BTC_USDT, intern edilmiş)"""
+        trade['symbol'] = sys.intern(f"{trade['coin']}_USDT")
+        return trade
     
     # ==================== TP KAYITLARI ====================
     
     def save_tp_record(self, trade_id: int, tp_level: int, price: float,
                        volume_closed: float, percentage: float, pnl: float):
-        """TP kaydı ekle"""
+        """TP kaydı ekle ve işlemin kapanan yüzde toplamını aynı transaction'da güncelle"""
         sql = """
         INSERT INTO tp_records (trade_id, tp_level, price, volume_closed, 
                                percentage_closed, pnl)
         VALUES (%s, %s, %s, %s, %s, %s)
         """
+        totals_sql = """
+        UPDATE trades
+        SET cumulative_pct_closed = cumulative_pct_closed + %s, tp_count = tp_count + 1
+        WHERE id = %s
+        """
         
-        with self.get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(sql, (trade_id, tp_level, price, volume_closed, 
-                                 percentage, pnl))
+        with self._cursor() as cur:
+            cur.execute(sql, (trade_id, tp_level, price, volume_closed, 
+                             percentage, pnl))
+            cur.execute(totals_sql, (percentage, trade_id))
     
     # ==================== GÜNLÜK PERFORMANS ====================
     
@@ -447,19 +634,37 @@ class Database:
     
     # ==================== BOT DURUMU ====================
     
+    SET_STATUS_SQL = """
+    INSERT INTO bot_status (key, value, updated_at)
+    VALUES (%s, %s, CURRENT_TIMESTAMP)
+    ON CONFLICT (key) DO UPDATE SET
+        value = EXCLUDED.value,
+        updated_at = CURRENT_TIMESTAMP
+    """
+    
     def set_bot_status(self, key: str, value: str):
         """Bot durumu kaydet"""
-        sql = """
-        INSERT INTO bot_status (key, value, updated_at)
-        VALUES (%s, %s, CURRENT_TIMESTAMP)
-        ON CONFLICT (key) DO UPDATE SET
-            value = EXCLUDED.value,
-            updated_at = CURRENT_TIMESTAMP
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(self.SET_STATUS_SQL, (key, value))
+    
+    def execute_many(self, ops: List[tuple]):
+        """
+        Kuyruktaki yazma işlemlerini tek transaction'da uygula
+        ops: [('set_status', key, value), ...]
         """
+        sql_map = {'set_status': self.SET_STATUS_SQL}
+        
+        grouped: Dict[str, List[tuple]] = {}
+        for op, *args in ops:
+            if op not in sql_map:
+                raise ValueError(f"Bilinmeyen veritabanı işlemi: {op}")
+            grouped.setdefault(op, []).append(tuple(args))
         
         with self.get_connection() as conn:
             with conn.cursor() as cur:
-                cur.execute(sql, (key, value))
+                for op, rows in grouped.items():
+                    cur.executemany(sql_map[op], rows)
     
     def get_bot_status(self, key: str) -> Optional[str]:
         """Bot durumu al"""
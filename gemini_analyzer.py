@@ -3,16 +3,256 @@ Gemini AI Kripto Analiz Modülü
 RSI, Trend, Likidite, Hacim ve Elliott Wave analizi
 """
 import json
-import time
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
+import numpy as np
 import google.generativeai as genai
 from loguru import logger
 import config
+from utils import njit, TokenBucket, json_loads as _loads
 
 
-@dataclass
+# Fallback TP/SL çarpanları (girişten %2, %4, %6, %8, %10)
+_BUY_TP_MULT = np.array([1.02, 1.04, 1.06, 1.08, 1.10])
+_SELL_TP_MULT = np.array([0.98, 0.96, 0.94, 0.92, 0.90])
+_BUY_SL = 0.97
+_SELL_SL = 1.03
+
+# Tüm GeminiAnalyzer nesneleri için ortak rate limit (2 saniyede 1 istek)
+_BUCKET = TokenBucket(rate=0.5, capacity=1)
+
+# _compute_all'un döndürdüğü trend kodları
+_TREND_NAMES = ("NEUTRAL", "STRONG_BULLISH", "BULLISH", "STRONG_BEARISH", "BEARISH")
+
+
+# Gemini prompt şablonları - sadece alanlar her çağrıda doldurulur
+_ANALYSIS_TMPL = """
+Sen profesyonel bir kripto trader'ısın. Aşağıdaki teknik verilere göre {coin}/USDT için detaylı analiz yap.
+
+## Teknik Veriler:
+- Güncel Fiyat: {current_price}
+- RSI (14): {rsi}
+- Trend: {trend}
+- EMA 9: {ema_9}
+- EMA 21: {ema_21}
+- EMA 50: {ema_50}
+- Elliott Wave: {elliott_wave}
+- Hacim Analizi: {volume}
+- 24s Değişim: {price_change_24h:.2f}%
+
+{context_block}
+
+## Analiz Kriterleri:
+1. RSI değerlendirmesi (aşırı alım/satım)
+2. Trend gücü ve yönü
+3. Elliott Wave fazı ve beklenen hareket
+4. Hacim teyidi
+5. Risk/Ödül oranı
+6. Likidite bölgeleri
+
+## İstenen Çıktı Formatı (JSON):
+{{
+    "recommendation": "BUY/SELL/HOLD",
+    "confidence": 0.0-1.0,
+    "entry_price": fiyat veya null,
+    "take_profits": [tp1, tp2, tp3, tp4, tp5],
+    "stop_loss": fiyat,
+    "leverage": 1-20,
+    "risk_level": "LOW/MEDIUM/HIGH",
+    "reasoning": "Detaylı açıklama"
+}}
+
+Günlük %10 kar hedefine ulaşmak için agresif ama kontrollü işlemler öner.
+Scalper gibi düşün - kısa vadeli fırsatları değerlendir.
+Risk yönetimini unutma - kasanın %2'si ile işlem yapılacak.
+
+SADECE JSON formatında yanıt ver, başka açıklama ekleme.
+"""
+
+_SCALPER_TMPL = """
+Sen agresif bir kripto scalper'ısın. {coin}/USDT için 15 dakika - 1 saat içinde kapanacak kısa vadeli işlem öner.
+
+## Veriler:
+- Fiyat: {current_price}
+- RSI: {rsi}
+- Kısa Vadeli Trend: {short_trend}
+- Son fiyatlar: {recent_prices}
+
+## Kurallar:
+- %0.5 - %2 arası kar hedefle
+- Sıkı stop loss kullan (%1 max)
+- Yüksek güven (>0.7) olmadan işlem önerme
+- Scalp için ideal RSI: 35-45 (long), 55-65 (short)
+
+JSON formatında yanıt ver:
+{{
+    "recommendation": "BUY/SELL/HOLD",
+    "confidence": 0.0-1.0,
+    "entry_price": fiyat,
+    "take_profits": [tp1, tp2],
+    "stop_loss": fiyat,
+    "leverage": 10-20,
+    "risk_level": "LOW/MEDIUM/HIGH",
+    "reasoning": "Kısa açıklama"
+}}
+
+SADECE JSON ver.
+"""
+
+_VALIDATE_TMPL = """
+Bir Telegram kanalından gelen kripto sinyalini doğrula:
+
+## Sinyal:
+- Coin: {coin}/USDT
+- Yön: {side}
+- Giriş Fiyatı: {entry}
+- Güncel Fiyat: {current_price}
+
+## Teknik Durum:
+- RSI: {rsi}
+- Trend: {trend}
+- Elliott Wave: {elliott}
+
+## Soru:
+Bu sinyal güvenilir mi? İşleme girmeli miyiz?
+
+JSON formatında yanıt:
+{{
+    "valid": true/false,
+    "confidence": 0.0-1.0,
+    "reasoning": "Açıklama"
+}}
+
+SADECE JSON ver.
+"""
+
+# Birden fazla sinyal tek istekte doğrulanır (sıra korunur)
+_VALIDATE_BATCH_TMPL = """
+Telegram kanallarından gelen kripto sinyallerini doğrula:
+
+## Sinyaller:
+{signals}
+
+## Soru:
+Her sinyal güvenilir mi? İşleme girmeli miyiz?
+
+JSON formatında, sinyallerle AYNI SIRADA bir liste ver:
+[
+    {{"valid": true/false, "confidence": 0.0-1.0, "reasoning": "Açıklama"}}
+]
+
+SADECE JSON ver.
+"""
+
+_VALIDATE_BATCH_ROW = ("{n}. {coin}/USDT | Yön: {side} | Giriş: {entry} | Güncel: {current_price} | "
+                       "RSI: {rsi} | Trend: {trend} | Elliott: {elliott}")
+
+
+# Trend tablosu: (fiyat-EMA9, EMA9-EMA21, EMA21-EMA50) işaretlerinin (-1/0/1)
+# 27 kombinasyonu -> trend kodu. Eşitlik durumları if/elif zinciriyle birebir aynı.
+_TREND_TABLE = np.zeros(27, dtype=np.int64)
+for _s1 in (-1, 0, 1):
+    for _s2 in (-1, 0, 1):
+        for _s3 in (-1, 0, 1):
+            _code = 0
+            if _s1 == _s2 == 1:
+                _code = 1 if _s3 == 1 else 2        # STRONG_BULLISH / BULLISH
+            elif _s1 == _s2 == -1:
+                _code = 3 if _s3 == -1 else 4       # STRONG_BEARISH / BEARISH
+            _TREND_TABLE[(_s1 + 1) * 9 + (_s2 + 1) * 3 + (_s3 + 1)] = _code
+
+
+@njit(cache=True)
+def _trend_code(current, ema_9, ema_21, ema_50):
+    """Fiyat/EMA dizilimine göre trend kodu (-> _TREND_NAMES), dallanmasız tablo araması"""
+    s1 = int(current > ema_9) - int(current < ema_9)
+    s2 = int(ema_9 > ema_21) - int(ema_9 < ema_21)
+    s3 = int(ema_21 > ema_50) - int(ema_21 < ema_50)
+    return _TREND_TABLE[(s1 + 1) * 9 + (s2 + 1) * 3 + (s3 + 1)]
+
+
+@njit(cache=True)
+def _compute_all(prices):
+    """
+    RSI(14), EMA 9/21/50, 24s değişim ve trend tek geçişte hesapla
+
+    Returns:
+        (rsi, ema_9, ema_21, ema_50, change_24h, trend_code)
+    """
+    n = prices.shape[0]
+    current = prices[n - 1] if n > 0 else 0.0
+
+    # RSI - son 14 mumun ortalama kazanç/kaybı
+    rsi = 50.0
+    if n >= 15:
+        gain = 0.0
+        loss = 0.0
+        for i in range(n - 14, n):
+            d = prices[i] - prices[i - 1]
+            if d > 0:
+                gain += d
+            elif d < 0:
+                loss -= d
+        avg_gain = gain / 14
+        avg_loss = loss / 14
+        if avg_loss == 0:
+            rsi = 100.0
+        else:
+            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+
+    # EMA'lar - ilk değer SMA, sonra tek döngüde güncelle
+    ema_9 = current
+    ema_21 = current
+    ema_50 = current
+    m9 = 2 / 10
+    m21 = 2 / 22
+    m50 = 2 / 51
+    total = 0.0
+    for i in range(n):
+        p = prices[i]
+        total += p
+        if i == 8:
+            ema_9 = total / 9
+        elif i > 8:
+            ema_9 = (p - ema_9) * m9 + ema_9
+        if i == 20:
+            ema_21 = total / 21
+        elif i > 20:
+            ema_21 = (p - ema_21) * m21 + ema_21
+        if i == 49:
+            ema_50 = total / 50
+        elif i > 49:
+            ema_50 = (p - ema_50) * m50 + ema_50
+
+    change_24h = 0.0
+    if n >= 24:
+        change_24h = (current - prices[n - 24]) / prices[n - 24] * 100
+
+    # Trend (kod -> _TREND_NAMES)
+    trend_code = 0
+    if n >= 20:
+        trend_code = _trend_code(current, ema_9, ema_21, ema_50)
+
+    return rsi, ema_9, ema_21, ema_50, change_24h, trend_code
+
+
+def _indicators(prices) -> Dict:
+    """Fiyat dizisinden teknik veri sözlüğü (_compute_all tek çağrısı)"""
+    prices = np.asarray(prices, dtype=np.float64)
+    rsi, ema_9, ema_21, ema_50, change_24h, trend_code = _compute_all(prices)
+    return {
+        "current_price": float(prices[-1]) if len(prices) else 0.0,
+        "rsi": round(float(rsi), 2),
+        "trend": _TREND_NAMES[trend_code],
+        "ema_9": round(float(ema_9), 8),
+        "ema_21": round(float(ema_21), 8),
+        "ema_50": round(float(ema_50), 8),
+        "price_change_24h": float(change_24h)
+    }
+
+
+@dataclass(slots=True, frozen=True)
 class MarketAnalysis:
     """Piyasa analizi sonucu"""
     coin: str
@@ -56,7 +296,7 @@ class TechnicalIndicators:
     def calculate_ema(prices: List[float], period: int) -> float:
         """EMA hesapla"""
         if len(prices) < period:
-            return prices[-1] if prices else 0
+            return prices[-1] if len(prices) else 0
         
         multiplier = 2 / (period + 1)
         ema = sum(prices[:period]) / period  # İlk SMA
@@ -72,22 +312,9 @@ class TechnicalIndicators:
         if len(prices) < 20:
             return "NEUTRAL"
         
-        ema_fast = TechnicalIndicators.calculate_ema(prices, 9)
-        ema_slow = TechnicalIndicators.calculate_ema(prices, 21)
-        ema_trend = TechnicalIndicators.calculate_ema(prices, 50)
-        
-        current_price = prices[-1]
-        
-        if current_price > ema_fast > ema_slow > ema_trend:
-            return "STRONG_BULLISH"
-        elif current_price > ema_fast > ema_slow:
-            return "BULLISH"
-        elif current_price < ema_fast < ema_slow < ema_trend:
-            return "STRONG_BEARISH"
-        elif current_price < ema_fast < ema_slow:
-            return "BEARISH"
-        else:
-            return "NEUTRAL"
+        # EMA 9/21/50 tek geçişte hesaplanıp sınıflandırılır
+        trend_code = _compute_all(np.asarray(prices, dtype=np.float64))[5]
+        return _TREND_NAMES[trend_code]
     
     @staticmethod
     def detect_elliott_wave(prices: List[float]) -> Dict:
@@ -186,53 +413,30 @@ class GeminiAnalyzer:
         genai.configure(api_key=self.api_key)
         self.model = genai.GenerativeModel(config.GEMINI_MODEL)
         self.tech = TechnicalIndicators()
-        self.last_request_time = 0
-        self.request_interval = 2  # Saniye - rate limit koruması
     
     def _rate_limit(self):
-        """Rate limit koruması"""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.request_interval:
-            time.sleep(self.request_interval - elapsed)
-        self.last_request_time = time.time()
+        """Rate limit koruması (process genelinde paylaşılan bucket)"""
+        _BUCKET.acquire()
     
-    def analyze_coin(self, coin: str, prices: List[float], 
-                     volumes: List[float] = None,
+    def analyze_coin(self, coin: str, prices: Union[List[float], np.ndarray], 
+                     volumes: Union[List[float], np.ndarray] = None,
                      additional_context: str = "") -> MarketAnalysis:
         """
         Coin'i kapsamlı analiz et
         
         Args:
             coin: Coin sembolü
-            prices: Fiyat listesi (en eski -> en yeni)
-            volumes: Hacim listesi
+            prices: Fiyat listesi veya numpy dizisi (en eski -> en yeni)
+            volumes: Hacim listesi veya numpy dizisi
             additional_context: Ek bağlam (sinyal bilgisi vb.)
         """
         self._rate_limit()
         
-        # Teknik göstergeleri hesapla
-        current_price = prices[-1] if prices else 0
-        rsi = self.tech.calculate_rsi(prices)
-        trend = self.tech.calculate_trend(prices)
-        elliott = self.tech.detect_elliott_wave(prices)
-        volume_analysis = self.tech.analyze_volume(volumes) if volumes else {"trend": "UNKNOWN"}
-        
-        # EMA'ları hesapla
-        ema_9 = self.tech.calculate_ema(prices, 9)
-        ema_21 = self.tech.calculate_ema(prices, 21)
-        ema_50 = self.tech.calculate_ema(prices, 50)
-        
-        technical_data = {
-            "current_price": current_price,
-            "rsi": rsi,
-            "trend": trend,
-            "ema_9": ema_9,
-            "ema_21": ema_21,
-            "ema_50": ema_50,
-            "elliott_wave": elliott,
-            "volume": volume_analysis,
-            "price_change_24h": ((prices[-1] - prices[-24]) / prices[-24] * 100) if len(prices) >= 24 else 0
-        }
+        # Teknik göstergeleri tek geçişte hesapla
+        technical_data = _indicators(prices)
+        technical_data["elliott_wave"] = self.tech.detect_elliott_wave(prices)
+        technical_data["volume"] = (self.tech.analyze_volume(volumes)
+                                    if volumes is not None and len(volumes) else {"trend": "UNKNOWN"})
         
         # Gemini'ye sor
         prompt = self._create_analysis_prompt(coin, technical_data, additional_context)
@@ -248,49 +452,8 @@ class GeminiAnalyzer:
     def _create_analysis_prompt(self, coin: str, technical_data: Dict, 
                                  additional_context: str = "") -> str:
         """Gemini için analiz prompt'u oluştur"""
-        prompt = f"""
-Sen profesyonel bir kripto trader'ısın. Aşağıdaki teknik verilere göre {coin}/USDT için detaylı analiz yap.
-
-## Teknik Veriler:
-- Güncel Fiyat: {technical_data['current_price']}
-- RSI (14): {technical_data['rsi']}
-- Trend: {technical_data['trend']}
-- EMA 9: {technical_data['ema_9']}
-- EMA 21: {technical_data['ema_21']}
-- EMA 50: {technical_data['ema_50']}
-- Elliott Wave: {technical_data['elliott_wave']}
-- Hacim Analizi: {technical_data['volume']}
-- 24s Değişim: {technical_data['price_change_24h']:.2f}%
-
-{f"## Ek Bilgi: {additional_context}" if additional_context else ""}
-
-## Analiz Kriterleri:
-1. RSI değerlendirmesi (aşırı alım/satım)
-2. Trend gücü ve yönü
-3. Elliott Wave fazı ve beklenen hareket
-4. Hacim teyidi
-5. Risk/Ödül oranı
-6. Likidite bölgeleri
-
-## İstenen Çıktı Formatı (JSON):
-{{
-    "recommendation": "BUY/SELL/HOLD",
-    "confidence": 0.0-1.0,
-    "entry_price": fiyat veya null,
-    "take_profits": [tp1, tp2, tp3, tp4, tp5],
-    "stop_loss": fiyat,
-    "leverage": 1-20,
-    "risk_level": "LOW/MEDIUM/HIGH",
-    "reasoning": "Detaylı açıklama"
-}}
-
-Günlük %10 kar hedefine ulaşmak için agresif ama kontrollü işlemler öner.
-Scalper gibi düşün - kısa vadeli fırsatları değerlendir.
-Risk yönetimini unutma - kasanın %2'si ile işlem yapılacak.
-
-SADECE JSON formatında yanıt ver, başka açıklama ekleme.
-"""
-        return prompt
+        context_block = f"## Ek Bilgi: {additional_context}" if additional_context else ""
+        return _ANALYSIS_TMPL.format_map({**technical_data, "coin": coin, "context_block": context_block})
     
     def _parse_gemini_response(self, response_text: str, coin: str, 
                                 technical_data: Dict) -> MarketAnalysis:
@@ -305,7 +468,7 @@ SADECE JSON formatında yanıt ver, başka açıklama ekleme.
             if json_text.endswith("```"):
                 json_text = json_text[:-3]
             
-            data = json.loads(json_text.strip())
+            data = _loads(json_text.strip().encode())
             
             return MarketAnalysis(
                 coin=coin,
@@ -349,23 +512,11 @@ SADECE JSON formatında yanıt ver, başka açıklama ekleme.
         
         # TP ve SL hesapla
         if recommendation == "BUY":
-            take_profits = [
-                current_price * 1.02,
-                current_price * 1.04,
-                current_price * 1.06,
-                current_price * 1.08,
-                current_price * 1.10
-            ]
-            stop_loss = current_price * 0.97
+            take_profits = (current_price * _BUY_TP_MULT).tolist()
+            stop_loss = current_price * _BUY_SL
         elif recommendation == "SELL":
-            take_profits = [
-                current_price * 0.98,
-                current_price * 0.96,
-                current_price * 0.94,
-                current_price * 0.92,
-                current_price * 0.90
-            ]
-            stop_loss = current_price * 1.03
+            take_profits = (current_price * _SELL_TP_MULT).tolist()
+            stop_loss = current_price * _SELL_SL
         else:
             take_profits = []
             stop_loss = None
@@ -384,14 +535,14 @@ SADECE JSON formatında yanıt ver, başka açıklama ekleme.
             risk_level="MEDIUM"
         )
     
-    def scalper_analysis(self, coin: str, prices: List[float],
-                         volumes: List[float] = None) -> MarketAnalysis:
+    def scalper_analysis(self, coin: str, prices: Union[List[float], np.ndarray],
+                         volumes: Union[List[float], np.ndarray] = None) -> MarketAnalysis:
         """
         Scalper modu - kısa vadeli hızlı işlemler için
         """
         self._rate_limit()
         
-        current_price = prices[-1] if prices else 0
+        current_price = float(prices[-1]) if len(prices) else 0
         rsi = self.tech.calculate_rsi(prices[-50:]) if len(prices) >= 50 else 50
         
         # Son 1 saatlik trend
@@ -403,35 +554,13 @@ SADECE JSON formatında yanıt ver, başka açıklama ekleme.
             elif recent_prices[-1] < recent_prices[0] * 0.995:
                 short_trend = "BEARISH"
         
-        prompt = f"""
-Sen agresif bir kripto scalper'ısın. {coin}/USDT için 15 dakika - 1 saat içinde kapanacak kısa vadeli işlem öner.
-
-## Veriler:
-- Fiyat: {current_price}
-- RSI: {rsi}
-- Kısa Vadeli Trend: {short_trend}
-- Son fiyatlar: {prices[-10:]}
-
-## Kurallar:
-- %0.5 - %2 arası kar hedefle
-- Sıkı stop loss kullan (%1 max)
-- Yüksek güven (>0.7) olmadan işlem önerme
-- Scalp için ideal RSI: 35-45 (long), 55-65 (short)
-
-JSON formatında yanıt ver:
-{{
-    "recommendation": "BUY/SELL/HOLD",
-    "confidence": 0.0-1.0,
-    "entry_price": fiyat,
-    "take_profits": [tp1, tp2],
-    "stop_loss": fiyat,
-    "leverage": 10-20,
-    "risk_level": "LOW/MEDIUM/HIGH",
-    "reasoning": "Kısa açıklama"
-}}
-
-SADECE JSON ver.
-"""
+        prompt = _SCALPER_TMPL.format(
+            coin=coin,
+            current_price=current_price,
+            rsi=rsi,
+            short_trend=short_trend,
+            recent_prices=[float(p) for p in prices[-10:]]
+        )
         
         try:
             response = self.model.generate_content(prompt)
@@ -447,7 +576,7 @@ SADECE JSON ver.
             return self._fallback_analysis(coin, {"current_price": current_price, "rsi": rsi, "trend": short_trend})
     
     def validate_signal(self, coin: str, side: str, entry: float,
-                        prices: List[float]) -> Tuple[bool, str, float]:
+                        prices: Union[List[float], np.ndarray]) -> Tuple[bool, str, float]:
         """
         Telegram sinyalini doğrula
         
@@ -456,37 +585,21 @@ SADECE JSON ver.
         """
         self._rate_limit()
         
-        current_price = prices[-1] if prices else entry
-        rsi = self.tech.calculate_rsi(prices)
-        trend = self.tech.calculate_trend(prices)
+        current_price = float(prices[-1]) if len(prices) else entry
+        indicators = _indicators(prices)
+        rsi = indicators["rsi"]
+        trend = indicators["trend"]
         elliott = self.tech.detect_elliott_wave(prices)
         
-        prompt = f"""
-Bir Telegram kanalından gelen kripto sinyalini doğrula:
-
-## Sinyal:
-- Coin: {coin}/USDT
-- Yön: {side}
-- Giriş Fiyatı: {entry}
-- Güncel Fiyat: {current_price}
-
-## Teknik Durum:
-- RSI: {rsi}
-- Trend: {trend}
-- Elliott Wave: {elliott}
-
-## Soru:
-Bu sinyal güvenilir mi? İşleme girmeli miyiz?
-
-JSON formatında yanıt:
-{{
-    "valid": true/false,
-    "confidence": 0.0-1.0,
-    "reasoning": "Açıklama"
-}}
-
-SADECE JSON ver.
-"""
+        prompt = _VALIDATE_TMPL.format(
+            coin=coin,
+            side=side,
+            entry=entry,
+            current_price=current_price,
+            rsi=rsi,
+            trend=trend,
+            elliott=elliott
+        )
         
         try:
             response = self.model.generate_content(prompt)
@@ -496,7 +609,7 @@ SADECE JSON ver.
                 if json_text.startswith("json"):
                     json_text = json_text[4:]
             
-            data = json.loads(json_text.strip())
+            data = _loads(json_text.strip().encode())
             return (
                 data.get("valid", False),
                 data.get("reasoning", ""),
@@ -504,18 +617,75 @@ SADECE JSON ver.
             )
         except Exception as e:
             logger.error(f"Sinyal doğrulama hatası: {e}")
-            # Fallback: Basit kontrol
-            price_diff = abs(current_price - entry) / entry
-            if price_diff > 0.05:  # %5'ten fazla fark
-                return (False, "Fiyat girişten çok uzaklaştı", 0.3)
-            
-            trend_match = (side == "LONG" and "BULLISH" in trend) or \
-                          (side == "SHORT" and "BEARISH" in trend)
+            return self._validate_fallback(side, entry, current_price, trend)
+    
+    @staticmethod
+    def _validate_fallback(side: str, entry: float, current_price: float,
+                           trend: str) -> Tuple[bool, str, float]:
+        """Gemini yanıt vermezse basit kontrol"""
+        price_diff = abs(current_price - entry) / entry
+        if price_diff > 0.05:  # %5'ten fazla fark
+            return (False, "Fiyat girişten çok uzaklaştı", 0.3)
+        
+        trend_match = (side == "LONG" and "BULLISH" in trend) or \
+                      (side == "SHORT" and "BEARISH" in trend)
+        
+        if trend_match:
+            return (True, "Trend uyumlu", 0.6)
+        else:
+            return (False, "Trend uyumsuz", 0.4)
+    
+    def validate_signals_batch(self, items: List[Tuple[str, str, float, Union[List[float], np.ndarray]]]
+                               ) -> List[Tuple[bool, str, float]]:
+        """
+        Birden fazla Telegram sinyalini tek Gemini isteğiyle doğrula
+        
+        Args:
+            items: [(coin, side, entry, prices), ...]
+        
+        Returns:
+            Her sinyal için (geçerli_mi, açıklama, güven_skoru) - girişle aynı sırada
+        """
+        if not items:
+            return []
+        if len(items) == 1:
+            return [self.validate_signal(*items[0])]
+        
+        self._rate_limit()
+        
+        rows = []
+        contexts = []
+        for n, (coin, side, entry, prices) in enumerate(items, 1):
+            current_price = float(prices[-1]) if len(prices) else entry
+            indicators = _indicators(prices)
+            trend = indicators["trend"]
+            rows.append(_VALIDATE_BATCH_ROW.format(
+                n=n, coin=coin, side=side, entry=entry, current_price=current_price,
+                rsi=indicators["rsi"], trend=trend,
+                elliott=self.tech.detect_elliott_wave(prices)
+            ))
+            contexts.append((side, entry, current_price, trend))
+        
+        prompt = _VALIDATE_BATCH_TMPL.format(signals="\n".join(rows))
+        
+        try:
+            response = self.model.generate_content(prompt)
+            json_text = response.text.strip()
+            if "```" in json_text:
+                json_text = json_text.split("```")[1]
+                if json_text.startswith("json"):
+                    json_text = json_text[4:]
             
-            if trend_match:
-                return (True, "Trend uyumlu", 0.6)
-            else:
-                return (False, "Trend uyumsuz", 0.4)
+            data = _loads(json_text.strip().encode())
+            if not isinstance(data, list) or len(data) != len(items):
+                raise ValueError(f"Beklenen {len(items)} sonuç, gelen: {data!r:.100}")
+            return [
+                (d.get("valid", False), d.get("reasoning", ""), float(d.get("confidence", 0.5)))
+                for d in data
+            ]
+        except Exception as e:
+            logger.error(f"Toplu sinyal doğrulama hatası: {e}")
+            return [self._validate_fallback(*ctx) for ctx in contexts]
 
 
 # Test
@@ -2,33 +2,156 @@
 LBank API Entegrasyonu - Spot ve Futures Trading
 LBank API Dokümantasyonu: https://www.lbank.com/docs/index.html
 """
+import binascii
 import hashlib
 import hmac
+import os
+import re
 import time
 import json
-import random
 import string
-import requests
+import ssl
+from functools import lru_cache, partial
+import httpx
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlencode
+import numpy as np
 from typing import Dict, Optional, List
 from loguru import logger
 import config
+from utils import json_loads, njit
+
+
+# HTTP/2 için h2 paketi gerekir (httpx[http2]) - yoksa HTTP/1.1 keep-alive ile devam
+try:
+    import h2  # noqa: F401
+    HAS_HTTP2 = True
+except ImportError:
+    HAS_HTTP2 = False
+
+
+def _cpu_has_sha_ni() -> bool:
+    """CPU SHA uzantılarını (SHA-NI / ARMv8 SHA2) destekliyor mu"""
+    try:
+        with open('/proc/cpuinfo') as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return 'sha_ni' in flags or 'sha2' in flags
+
+
+# Durum koduna göre tekrar denenecek yanıtlar (rate limit ve geçici sunucu hataları)
+_RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+_STATUS_RETRIES = 3
+
+
+# urlencode'un kaçış uygulamadığı karakterler dışında bir şey varsa yavaş yola düş
+_NEEDS_QUOTE = re.compile(r'[^A-Za-z0-9_.~-]')
+
+
+@njit(cache=True, fastmath=True)
+def _calc_sizes(balances, risk_pct):
+    """Bakiye dizisinden risk yüzdesine göre pozisyon büyüklükleri"""
+    return np.round(balances * (risk_pct / 100.0), 2)
+
+
+def _encode_params(params: Dict) -> str:
+    """Parametreleri alfabetik sırayla form-urlencoded string'e çevir"""
+    sorted_params = [(k, str(v)) for k, v in sorted(params.items())]
+    
+    # Semboller, sayılar ve base62 echostr kaçış gerektirmez - urlencode'u atla
+    if _NEEDS_QUOTE.search(''.join(k + v for k, v in sorted_params)):
+        return urlencode(sorted_params)
+    return '&'.join(k + '=' + v for k, v in sorted_params)
+
+
+# LBank hata kodları (import sırasında bir kez kurulur)
+_ERROR_MESSAGES: Dict[str, str] = {
+    '10000': 'Dahili hata',
+    '10001': 'Gerekli parametreler eksik',
+    '10002': 'Doğrulama hatası',
+    '10003': 'Geçersiz parametre',
+    '10004': 'İstek çok sık',
+    '10005': 'Secret key mevcut değil',
+    '10006': 'Kullanıcı mevcut değil',
+    '10007': 'Geçersiz imza',
+    '10008': 'Geçersiz işlem çifti',
+    '10009': 'Limit emir için fiyat ve miktar gerekli',
+    '10010': 'Fiyat/miktar minimum gereksinimin altında',
+    '10014': 'Hesapta yetersiz bakiye',
+    '10016': 'Yetersiz hesap bakiyesi',
+    '10022': 'API Key izni reddedildi - Geçersiz IP veya yetkiler',
+    '10031': 'echostr uzunluğu 30-40 karakter olmalı',
+    '10600': 'Replay saldırısı filtresi - timestamp kontrol edin',
+}
+
+
+# echostr için 256 bayt -> base62 karakter çeviri tablosu (tek C çağrısıyla dönüşüm)
+_ECHO_ALPHABET = (string.ascii_letters + string.digits).encode()
+_ECHO_TABLE = bytes(_ECHO_ALPHABET[b % len(_ECHO_ALPHABET)] for b in range(256))
 
 
 class LBankAPI:
     """LBank Spot ve Futures API Client - V2 API"""
     
-    def __init__(self):
+    def __init__(self, client: httpx.Client = None):
+        """
+        Args:
+            client: Paylaşılan HTTP istemcisi (verilmezse kendi bağlantı havuzunu kurar)
+        """
         self.api_key = config.LBANK_API_KEY
         self.secret_key = config.LBANK_SECRET_KEY
+        # İmza için anahtarlı HMAC şablonu - her istekte .copy() ile yeniden kullanılır
+        self._secret_bytes = self.secret_key.encode('utf-8')
+        self._hmac_template = hmac.new(self._secret_bytes, b'', hashlib.sha256)
         self.base_url = "https://api.lbank.info"
         self.futures_url = "https://fapi.lbank.info"
-        self.session = requests.Session()
+        
+        # HTTP/2: aynı host'a giden eşzamanlı istekler tek TLS bağlantısında çoğullanır
+        if client is None:
+            # Havuz limitleri transport'a verilir - transport= verilince Client'ın limits= parametresi yok sayılır
+            # retries=3 sadece bağlantı hatalarını tekrarlar; 429/5xx için _send_with_retry kullanılır
+            client = httpx.Client(
+                http2=HAS_HTTP2,
+                transport=httpx.HTTPTransport(
+                    http2=HAS_HTTP2, retries=3,
+                    limits=httpx.Limits(max_connections=16, max_keepalive_connections=8)
+                ),
+                timeout=30.0,
+                # Sadece kendi kurduğumuz istemciye varsayılan header'lar - paylaşılan istemci değiştirilmez
+                headers={
+                    'Connection': 'keep-alive',
+                    'Accept-Encoding': 'gzip, deflate',
+                }
+            )
+        self._client = client
+        
+        # Public GET yanıt önbelleği: (url, params) -> (zaman, ETag, ham gövde)
+        # Gövde saklanır ve her isabette yeniden çözülür - çağıranlar aynı dict'i paylaşmaz
+        self._public_cache: Dict[tuple, tuple] = {}
+        self._public_ttl = 0.2  # Saniye
+        
+        # Sık çağrılan uç noktalar için method/URL önceden bağlanmış istek fonksiyonları
+        futures_pub = f"{self.futures_url}/cfd/openApi/v1/pub"
+        self._send_get_account = partial(self._send_read, f"{futures_pub}/getAccount")
+        self._send_get_positions = partial(self._send_read, f"{futures_pub}/getPositions")
+        self._send_get_user_info = partial(self._send_read, f"{self.base_url}/v2/user_info.do")
+        self._read_verbs: Dict[str, str] = {}  # Okuma uç noktası -> çalıştığı görülen HTTP metodu
+        self._send_get_market_price = partial(self._send, 'GET', f"{futures_pub}/getMarketPrice",
+                                              signed=False)
+    
+    @property
+    def session(self) -> httpx.Client:
+        """Paylaşılan keep-alive HTTP istemcisi"""
+        return self._client
+    
+    def close(self):
+        """HTTP bağlantı havuzunu kapat"""
+        self._client.close()
     
     def _generate_echostr(self, length: int = 35) -> str:
         """30-40 karakter arası rastgele echostr oluştur"""
-        chars = string.ascii_letters + string.digits
-        return ''.join(random.choice(chars) for _ in range(length))
+        return os.urandom(length).translate(_ECHO_TABLE).decode('ascii')
     
     def _generate_sign_v2(self, params: Dict) -> str:
         """
@@ -38,37 +161,49 @@ class LBankAPI:
         3. HmacSHA256 ile imzala
         """
         # Parametreleri alfabetik sırala
-        sorted_params = sorted(params.items(), key=lambda x: x[0])
-        params_string = urlencode(sorted_params)
-        
-        # MD5 hash al ve uppercase yap
-        md5_hash = hashlib.md5(params_string.encode('utf-8')).hexdigest().upper()
+        params_string = _encode_params(params)
         
-        # HmacSHA256 ile imzala
-        signature = hmac.new(
-            self.secret_key.encode('utf-8'),
-            md5_hash.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
+        # MD5 hash al ve uppercase yap - hex doğrudan bytes olarak üretilir (str dönüşümü yok)
+        md5_hash = binascii.hexlify(hashlib.md5(params_string.encode('ascii')).digest()).upper()
         
-        return signature
+        # HmacSHA256 ile imzala - anahtar zaten işlenmiş şablonu kopyala
+        mac = self._hmac_template.copy()
+        mac.update(md5_hash)
+        return mac.hexdigest()
+    
+    def _get_timestamp_ms(self) -> int:
+        """Milisaniye cinsinden timestamp (float işlemi olmadan)"""
+        return time.time_ns() // 1_000_000
     
     def _get_timestamp(self) -> str:
-        """Milisaniye cinsinden timestamp"""
-        return str(int(time.time() * 1000))
+        """Milisaniye cinsinden timestamp (imza/header için string)"""
+        return str(self._get_timestamp_ms())
     
     def _request(self, method: str, endpoint: str, params: Dict = None, 
                  is_futures: bool = False, signed: bool = True) -> Dict:
         """API isteği gönder - LBank V2 formatında"""
         base = self.futures_url if is_futures else self.base_url
-        url = f"{base}{endpoint}"
-        
+        return self._send(method, f"{base}{endpoint}", params, signed)
+    
+    def _send(self, method: str, url: str, params: Dict = None, signed: bool = True,
+              _retried: bool = False) -> Dict:
+        """Tam URL'ye isteği imzalayıp gönder"""
         if params is None:
             params = {}
         
-        headers = {
-            'Content-Type': 'application/x-www-form-urlencoded'
-        }
+        headers = {}
+        
+        # İmzasız GET'ler için kısa süreli önbellek ve ETag doğrulaması
+        cache_key = cached = None
+        if not signed and method.upper() == 'GET':
+            # 'time' (kline başlangıcı, ms) her çağrıda farklı - anahtara girmez
+            cache_key = (url, tuple(sorted(kv for kv in params.items() if kv[0] != 'time')))
+            cached = self._public_cache.get(cache_key)
+            if cached:
+                if time.monotonic() - cached[0] < self._public_ttl:
+                    return {'success': True, 'data': json_loads(cached[2])}
+                if cached[1]:
+                    headers['If-None-Match'] = cached[1]
         
         if signed:
             # V2 API gereksinimleri
@@ -78,26 +213,38 @@ class LBankAPI:
             
             # Header'lara ekle
             headers['timestamp'] = timestamp
-            headers['signature_method'] = 'HmacSHA256'
             headers['echostr'] = echostr
+            headers['signature_method'] = 'HmacSHA256'
             
-            # İmza için parametrelere ekle
-            sign_params = params.copy()
-            sign_params['timestamp'] = timestamp
-            sign_params['echostr'] = echostr
-            sign_params['signature_method'] = 'HmacSHA256'
+            # İmza alanlarını kopya yerine geçici olarak ekle - gövdede sadece 'sign' gider
+            params['timestamp'] = timestamp
+            params['echostr'] = echostr
+            params['signature_method'] = 'HmacSHA256'
+            sign = self._generate_sign_v2(params)
+            del params['timestamp'], params['echostr'], params['signature_method']
             
-            # İmza oluştur
-            params['sign'] = self._generate_sign_v2(sign_params)
+            params['sign'] = sign
         
+        is_get = method.upper() == 'GET'
+        if not is_get:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
         try:
-            if method.upper() == 'GET':
-                response = self.session.get(url, params=params, headers=headers, timeout=30)
-            else:
-                response = self.session.post(url, data=params, headers=headers, timeout=30)
+            response = self._send_with_retry(
+                method.upper(), url,
+                params=params if is_get else None,
+                # POST gövdesi önceden bytes'a kodlanır
+                content=None if is_get else _encode_params(params).encode('ascii'),
+                headers=headers
+            )
+            
+            # 304 - içerik değişmedi, önbellekteki gövdeyi yeniden kullan
+            if cached and response.status_code == 304:
+                self._public_cache[cache_key] = (time.monotonic(), cached[1], cached[2])
+                return {'success': True, 'data': json_loads(cached[2])}
             
             response.raise_for_status()
-            data = response.json()
+            
+            data = json_loads(response.content)
             
             # LBank hata kontrolü
             if isinstance(data, dict):
@@ -112,33 +259,76 @@ class LBankAPI:
                     logger.error(f"LBank API Hatası: {error_code} - {error_msg}")
                     return {'success': False, 'error': error_msg, 'code': error_code}
             
-            return {'success': True, 'data': data}
+            result = {'success': True, 'data': data}
+            if cache_key:
+                if len(self._public_cache) > 512:
+                    self._public_cache.clear()
+                self._public_cache[cache_key] = (time.monotonic(), response.headers.get('ETag'),
+                                                 response.content)
+            return result
             
-        except requests.exceptions.RequestException as e:
-            logger.error(f"API İsteği Hatası: {e}")
+        except httpx.TransportError as e:
+            # Bağlantı/zaman aşımı: GET'ler bir kez sessizce tekrarlanır (emirler tekrarlanmaz)
+            if is_get and not _retried:
+                time.sleep(0.2)
+                params.pop('sign', None)
+                return self._send(method, url, params, signed, _retried=True)
+            logger.opt(lazy=True).error("API Bağlantı Hatası: {}", lambda: str(e))
+            return {'success': False, 'error': str(e)}
+        except httpx.HTTPStatusError as e:
+            logger.opt(lazy=True).error("API İsteği Hatası: {}", lambda: str(e))
+            return {'success': False, 'error': str(e), 'status': e.response.status_code}
+        except httpx.HTTPError as e:
+            logger.opt(lazy=True).error("API İsteği Hatası: {}", lambda: str(e))
+            return {'success': False, 'error': str(e)}
+        except ValueError as e:
+            # Geçersiz JSON gövdesi (orjson/json JSONDecodeError)
+            logger.opt(lazy=True).error("API Yanıtı Çözümlenemedi: {}", lambda: str(e))
             return {'success': False, 'error': str(e)}
     
+    def _send_with_retry(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        429/5xx yanıtlarında üstel bekleme ile tekrar dene (0.2s, 0.4s, 0.8s)
+        Sadece idempotent GET istekleri tekrarlanır - emir POST'ları iki kez gönderilmez
+        """
+        response = self._client.request(method, url, **kwargs)
+        if method != 'GET':
+            return response
+        for attempt in range(_STATUS_RETRIES):
+            if response.status_code not in _RETRY_STATUSES:
+                break
+            time.sleep(0.2 * (2 ** attempt))
+            response = self._client.request(method, url, **kwargs)
+        return response
+    
+    def _send_read(self, url: str, params: Dict = None) -> Dict:
+        """
+        İmzalı okuma isteği - uç nokta başına çalışan metot hatırlanır
+        Önce GET denenir (form gövdesi yok); GET herhangi bir şekilde başarısız olursa
+        (405, 404 veya 200 içinde LBank hata kodu) belgelenen POST'a geçilir
+        """
+        if params is None:
+            params = {}
+        
+        verb = self._read_verbs.get(url)
+        if verb:
+            return self._send(verb, url, params)
+        
+        result = self._send('GET', url, params)
+        if result['success']:
+            self._read_verbs[url] = 'GET'
+            return result
+        
+        params.pop('sign', None)
+        result = self._send('POST', url, params)
+        if result['success']:
+            logger.debug(f"{url} GET kabul etmiyor, POST kullanılacak")
+            self._read_verbs[url] = 'POST'
+        return result
+    
     def _get_error_message(self, error_code) -> str:
         """LBank hata kodlarını çevir"""
-        error_messages = {
-            '10000': 'Dahili hata',
-            '10001': 'Gerekli parametreler eksik',
-            '10002': 'Doğrulama hatası',
-            '10003': 'Geçersiz parametre',
-            '10004': 'İstek çok sık',
-            '10005': 'Secret key mevcut değil',
-            '10006': 'Kullanıcı mevcut değil',
-            '10007': 'Geçersiz imza',
-            '10008': 'Geçersiz işlem çifti',
-            '10009': 'Limit emir için fiyat ve miktar gerekli',
-            '10010': 'Fiyat/miktar minimum gereksinimin altında',
-            '10014': 'Hesapta yetersiz bakiye',
-            '10016': 'Yetersiz hesap bakiyesi',
-            '10022': 'API Key izni reddedildi - Geçersiz IP veya yetkiler',
-            '10031': 'echostr uzunluğu 30-40 karakter olmalı',
-            '10600': 'Replay saldırısı filtresi - timestamp kontrol edin',
-        }
-        return error_messages.get(str(error_code), f'Bilinmeyen hata: {error_code}')
+        return _ERROR_MESSAGES.get(str(error_code), f'Bilinmeyen hata: {error_code}')
     
     # ==================== SPOT API ====================
     
@@ -158,13 +348,13 @@ class LBankAPI:
             'symbol': symbol.lower(),
             'size': size,
             'type': type_,
-            'time': self._get_timestamp()
+            'time': self._get_timestamp_ms()
         }
         return self._request('GET', '/v2/kline.do', params, signed=False)
     
     def get_user_info(self) -> Dict:
         """Hesap bilgilerini al"""
-        return self._request('POST', '/v2/user_info.do', {})
+        return self._send_get_user_info({})
     
     def get_balance(self) -> Dict:
         """Bakiye bilgilerini al"""
@@ -177,11 +367,11 @@ class LBankAPI:
     
     def futures_get_account(self) -> Dict:
         """Futures hesap bilgilerini al"""
-        return self._request('POST', '/cfd/openApi/v1/pub/getAccount', {}, is_futures=True)
+        return self._send_get_account({})
     
     def futures_get_positions(self) -> Dict:
         """Açık pozisyonları al"""
-        return self._request('POST', '/cfd/openApi/v1/pub/getPositions', {}, is_futures=True)
+        return self._send_get_positions({})
     
     def futures_open_position(self, symbol: str, side: str, volume: float, 
                                leverage: int = 20, price: float = None,
@@ -284,8 +474,7 @@ class LBankAPI:
     def futures_get_market_price(self, symbol: str) -> Dict:
         """Futures market fiyatını al"""
         params = {'symbol': symbol.upper()}
-        return self._request('GET', '/cfd/openApi/v1/pub/getMarketPrice', params, 
-                           is_futures=True, signed=False)
+        return self._send_get_market_price(params)
     
     def futures_get_kline(self, symbol: str, interval: str = '1h', 
                           limit: int = 100) -> Dict:
@@ -302,10 +491,50 @@ class LBankAPI:
 class LBankTrader:
     """LBank Trading İşlemleri Yöneticisi"""
     
-    def __init__(self):
-        self.api = LBankAPI()
+    def __init__(self, api: LBankAPI = None):
+        """
+        Args:
+            api: Paylaşılan LBankAPI (bağlantı havuzu ve önbellekler ortak kullanılır)
+        """
+        self.api = api or LBankAPI()
         self.leverage = config.LEVERAGE
         self.risk_percentage = config.RISK_PERCENTAGE
+        self._pos_cache: Dict[str, Dict] = {}  # Sembol -> pozisyon (kısa ömürlü)
+        self._pos_cache_ts = 0.0
+    
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def _normalize_symbol(symbol: str) -> str:
+        """
+        Sembolü LBank futures formatına çevir
+        BTCUSDT / btc_usdt -> BTC_USDT; sadece baz coin verilirse USDT eklenir (BTC -> BTC_USDT)
+        """
+        symbol = symbol.upper()
+        if symbol.endswith('_USDT'):
+            return symbol
+        if symbol.endswith('USDT'):
+            return symbol[:-4] + '_USDT'
+        return symbol + '_USDT'
+    
+    def _get_positions(self, max_age: float = 0.5) -> Dict:
+        """
+        Açık pozisyonları sembole göre getir
+        max_age saniyeden yeni bir anlık görüntü varsa API'ye tekrar gidilmez
+        """
+        if time.monotonic() - self._pos_cache_ts < max_age:
+            return {'success': True, 'data': self._pos_cache}
+        
+        positions = self.api.futures_get_positions()
+        if not positions['success']:
+            return positions
+        
+        self._pos_cache = {pos.get('symbol'): pos for pos in positions.get('data') or []}
+        self._pos_cache_ts = time.monotonic()
+        return {'success': True, 'data': self._pos_cache}
+    
+    def _invalidate_positions(self):
+        """Pozisyonu değiştiren işlemlerden sonra önbelleği geçersiz kıl"""
+        self._pos_cache_ts = 0.0
     
     def get_available_balance(self) -> float:
         """Kullanılabilir bakiyeyi al"""
@@ -329,6 +558,14 @@ class LBankTrader:
         position_size = balance * (self.risk_percentage / 100)
         return round(position_size, 2)
     
+    def calculate_position_sizes_batch(self, balances: List[float]) -> List[float]:
+        """
+        Birden fazla bakiye için pozisyon büyüklüklerini tek seferde hesapla
+        (çok sayıda sembolün boyutlandırıldığı portföy döngüleri için)
+        """
+        sizes = _calc_sizes(np.asarray(balances, dtype=np.float64), float(self.risk_percentage))
+        return sizes.tolist()
+    
     def open_trade(self, symbol: str, side: str, entries: List[float] = None,
                    take_profits: List[float] = None, stop_loss: float = None) -> Dict:
         """
@@ -342,8 +579,7 @@ class LBankTrader:
             stop_loss: Stop loss fiyatı
         """
         # Sembolü formatla
-        if not symbol.endswith('_USDT'):
-            symbol = symbol.replace('USDT', '_USDT')
+        symbol = self._normalize_symbol(symbol)
         
         balance = self.get_available_balance()
         total_position = self.calculate_position_size(balance)
@@ -353,8 +589,10 @@ class LBankTrader:
         # Birden fazla giriş varsa böl
         if entries and len(entries) > 1:
             position_per_entry = total_position / len(entries)
-            for i, entry_price in enumerate(entries):
-                result = self.api.futures_open_position(
+            
+            # Girişler birbirinden bağımsız - emirleri paralel gönder (Session havuzu paylaşılır)
+            def place(entry_price):
+                return self.api.futures_open_position(
                     symbol=symbol,
                     side=side,
                     volume=position_per_entry,
@@ -363,6 +601,11 @@ class LBankTrader:
                     stop_loss=stop_loss,
                     take_profit=take_profits[0] if take_profits else None
                 )
+            
+            with ThreadPoolExecutor(max_workers=min(8, len(entries))) as executor:
+                entry_results = list(executor.map(place, entries))
+            
+            for i, (entry_price, result) in enumerate(zip(entries, entry_results)):
                 results.append({
                     'entry': i + 1,
                     'price': entry_price,
@@ -389,6 +632,7 @@ class LBankTrader:
                 'result': result
             })
         
+        self._invalidate_positions()
         return {
             'symbol': symbol,
             'side': side,
@@ -398,48 +642,54 @@ class LBankTrader:
             'stop_loss': stop_loss
         }
     
-    def close_partial(self, symbol: str, percentage: float = 20) -> Dict:
+    def close_partial(self, symbol: str, percentage: float = 20,
+                      position: Dict = None) -> Dict:
         """
         Pozisyonun belirli bir yüzdesini kapat (TP için)
+        
+        Args:
+            position: Çağıranın elindeki güncel pozisyon (verilirse tekrar çekilmez)
         """
-        if not symbol.endswith('_USDT'):
-            symbol = symbol.replace('USDT', '_USDT')
+        symbol = self._normalize_symbol(symbol)
         
-        positions = self.api.futures_get_positions()
-        if not positions['success']:
-            return positions
+        pos = position
+        if pos is None:
+            positions = self._get_positions()
+            if not positions['success']:
+                return positions
+            
+            pos = positions['data'].get(symbol)
+            if pos is None:
+                return {'success': False, 'error': 'Pozisyon bulunamadı'}
         
-        for pos in positions.get('data', []):
-            if pos.get('symbol') == symbol:
-                current_volume = float(pos.get('volume', 0))
-                close_volume = current_volume * (percentage / 100)
-                
-                return self.api.futures_close_position(
-                    symbol=symbol,
-                    position_id=pos.get('positionId'),
-                    close_volume=close_volume
-                )
+        current_volume = float(pos.get('volume', 0))
+        close_volume = current_volume * (percentage / 100)
         
-        return {'success': False, 'error': 'Pozisyon bulunamadı'}
+        self._invalidate_positions()
+        return self.api.futures_close_position(
+            symbol=symbol,
+            position_id=pos.get('positionId'),
+            close_volume=close_volume
+        )
     
     def move_stop_to_entry(self, symbol: str, entry_price: float) -> Dict:
         """Stop loss'u giriş fiyatına çek (başabaş)"""
-        if not symbol.endswith('_USDT'):
-            symbol = symbol.replace('USDT', '_USDT')
+        symbol = self._normalize_symbol(symbol)
         
-        positions = self.api.futures_get_positions()
+        positions = self._get_positions()
         if not positions['success']:
             return positions
         
-        for pos in positions.get('data', []):
-            if pos.get('symbol') == symbol:
-                return self.api.futures_modify_position(
-                    symbol=symbol,
-                    position_id=pos.get('positionId'),
-                    stop_loss=entry_price
-                )
+        pos = positions['data'].get(symbol)
+        if pos is None:
+            return {'success': False, 'error': 'Pozisyon bulunamadı'}
         
-        return {'success': False, 'error': 'Pozisyon bulunamadı'}
+        self._invalidate_positions()
+        return self.api.futures_modify_position(
+            symbol=symbol,
+            position_id=pos.get('positionId'),
+            stop_loss=entry_price
+        )
 
 
 # Test fonksiyonu
@@ -450,22 +700,24 @@ def test_connection():
     print("=" * 50)
     print("LBank API Bağlantı Testi")
     print("=" * 50)
-    
-    # Spot ticker testi
-    print("\n1. Spot Ticker Testi (BTC/USDT):")
-    result = api.get_ticker('btc_usdt')
-    print(f"   Sonuç: {result}")
-    
-    # Futures hesap testi
-    print("\n2. Futures Hesap Testi:")
-    result = api.futures_get_account()
-    print(f"   Sonuç: {result}")
-    
-    # Bakiye testi
-    print("\n3. Bakiye Testi:")
-    trader = LBankTrader()
-    balance = trader.get_available_balance()
-    print(f"   Kullanılabilir Bakiye: {balance} USDT")
+    # hashlib/hmac imzaları OpenSSL üzerinden gider; OpenSSL SHA-NI'yi çalışma anında
+    # kendisi seçer - bu kontrol sadece tanı amaçlı (import sırasında /proc okunmaz)
+    print(f"İmza: {ssl.OPENSSL_VERSION} | SHA-NI: {'var' if _cpu_has_sha_ni() else 'yok'}")
+    print(f"HTTP/2: {'aktif' if HAS_HTTP2 else 'yok (h2 paketi kurulu değil)'}")
+    
+    trader = LBankTrader(api=api)
+    
+    # Üç bağlantı testi paralel çalışır, çıktı sırası korunur
+    tests = [
+        ("1. Spot Ticker Testi (BTC/USDT):", lambda: f"Sonuç: {api.get_ticker('btc_usdt')}"),
+        ("2. Futures Hesap Testi:", lambda: f"Sonuç: {api.futures_get_account()}"),
+        ("3. Bakiye Testi:", lambda: f"Kullanılabilir Bakiye: {trader.get_available_balance()} USDT"),
+    ]
+    with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+        results = executor.map(lambda test: test[1](), tests)
+        for (title, _), line in zip(tests, results):
+            print(f"\n{title}")
+            print(f"   {line}")
     
     print("\n" + "=" * 50)
     print("Test tamamlandı!")
@@ -3,21 +3,28 @@ Kripto Trading Bot - Ana Program
 Telegram sinyalleri + Gemini AI + LBank Futures
 """
 import asyncio
+import json
 import signal
 import sys
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import List
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.interval import IntervalTrigger
-from apscheduler.triggers.cron import CronTrigger
+from operator import attrgetter
+from typing import TYPE_CHECKING, Dict, List, Optional
+from asyncio_throttle import Throttler
+import numpy as np
+from cachetools import TTLCache
 from loguru import logger
 import config
 from lbank_api import LBankAPI, LBankTrader
-from telegram_signals import TelegramSignalReader, TradingSignal, SignalParser, ManualSignalInput
-from gemini_analyzer import GeminiAnalyzer, MarketAnalysis
 from database import Database
 from trading_strategy import TradingStrategy, TPManager
 
+if TYPE_CHECKING:
+    # Ağır modüller (telethon, google.generativeai) ihtiyaç anında yüklenir
+    from telegram_signals import TradingSignal
+    from gemini_analyzer import GeminiAnalyzer
+
 
 # Loglama yapılandırması
 logger.remove()
@@ -35,6 +42,99 @@ logger.add(
 )
 
 
+def _parse_klines(data) -> Optional[np.ndarray]:
+    """Ham mum listesini tek seferde (n, 6) float dizisine çevir: ts, o, h, l, c, v"""
+    if not data:
+        return None
+    try:
+        arr = np.asarray(data, dtype=object)
+    except ValueError:
+        return None
+    if arr.ndim != 2 or arr.shape[1] < 6:
+        return None
+    return arr[:, :6].astype(np.float64)
+
+
+def _resample_5m_to_1h(arr: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Ardışık 5m mumlarından 1h mumları türet (saat başına hizalı)
+    Son saat eksikse kısmi mum olarak eklenir; boşluk varsa None
+    """
+    if len(arr) < 24:
+        return None
+    ts = arr[:, 0]
+    step = ts[1] - ts[0]
+    if step <= 0 or not np.all(np.diff(ts) == step):
+        return None
+    
+    hour = step * 12
+    start = int(np.argmax(ts[:12] % hour == 0))
+    if ts[start] % hour:
+        return None
+    arr = arr[start:]
+    
+    full = len(arr) // 12 * 12
+    groups = arr[:full].reshape(-1, 12, 6)
+    out = np.empty((len(groups), 6))
+    out[:, 0] = groups[:, 0, 0]
+    out[:, 1] = groups[:, 0, 1]
+    out[:, 2] = groups[:, :, 2].max(1)
+    out[:, 3] = groups[:, :, 3].min(1)
+    out[:, 4] = groups[:, -1, 4]
+    out[:, 5] = groups[:, :, 5].sum(1)
+    
+    tail = arr[full:]
+    if len(tail):
+        partial = (tail[0, 0], tail[0, 1], tail[:, 2].max(), tail[:, 3].min(),
+                   tail[-1, 4], tail[:, 5].sum())
+        out = np.vstack((out, partial))
+    return out
+
+
+# Gemini analizi için gereken en az 1h mum; 5m tamponu ilk çekimde bunun 12 katıyla doldurulur
+_MIN_1H_CANDLES = 50
+_SEED_5M = 12 * _MIN_1H_CANDLES
+
+
+class _CandleRing:
+    """
+    Sembol başına sabit boyutlu mum tamponu
+    Her satır iki kez yazılır, böylece kronolojik görünüm kopyasız tek dilimdir
+    """
+    __slots__ = ('cap', 'buf', 'count', 'last_ts', 'updated')
+    
+    def __init__(self, cap: int = 200):
+        self.cap = cap
+        self.buf = np.empty((2 * cap, 6))
+        self.count = 0
+        self.last_ts = -np.inf
+        self.updated = 0.0
+    
+    def _write(self, i: int, row: np.ndarray):
+        j = i % self.cap
+        self.buf[j] = row
+        self.buf[j + self.cap] = row
+    
+    def extend(self, arr: np.ndarray):
+        """Sadece yeni mumları ekle; son (açık) mum güncellenir"""
+        arr = arr[arr[:, 0] >= self.last_ts]
+        if len(arr) and self.count and arr[0, 0] == self.last_ts:
+            self._write(self.count - 1, arr[0])
+            arr = arr[1:]
+        for row in arr:
+            self._write(self.count, row)
+            self.count += 1
+        if self.count:
+            self.last_ts = self.buf[(self.count - 1) % self.cap, 0]
+        self.updated = time.monotonic()
+    
+    def view(self) -> np.ndarray:
+        """En eskiden en yeniye mumlar (tampon üzerinde görünüm)"""
+        n = min(self.count, self.cap)
+        start = (self.count - n) % self.cap
+        return self.buf[start:start + n]
+
+
 class KriptoBot:
     """Ana Trading Bot"""
     
@@ -45,15 +145,51 @@ class KriptoBot:
         
         # Bileşenler
         self.db = Database()
+        # Tüm LBank çağrıları tek bağlantı havuzunu paylaşır
         self.lbank_api = LBankAPI()
-        self.lbank_trader = LBankTrader()
-        self.gemini = GeminiAnalyzer()
-        self.strategy = TradingStrategy()
+        self.lbank_trader = LBankTrader(api=self.lbank_api)
+        self.strategy = TradingStrategy(lbank=self.lbank_trader)
         self.tp_manager = TPManager(self.db, self.lbank_trader)
-        self.telegram = TelegramSignalReader()
         
-        # Scheduler
-        self.scheduler = AsyncIOScheduler()
+        # Telegram sadece API bilgileri varsa yüklenir
+        self.telegram = None
+        if config.TELEGRAM_API_ID:
+            from telegram_signals import TelegramSignalReader
+            self.telegram = TelegramSignalReader()
+        
+        # Periyodik görevler: ad -> çalışan task (aynı görevden tek örnek)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        
+        # Kline istekleri paralel ama sınırlı (LBank rate limit)
+        self._klines_sem = asyncio.Semaphore(4)
+        
+        # Upstream başına merkezi hız sınırlayıcılar (token bucket)
+        self.lbank_limit = Throttler(rate_limit=20, period=1)
+        self.gemini_limit = Throttler(rate_limit=10, period=60)
+        
+        # Kısa ömürlü API önbellekleri - TTL mum periyoduna göre
+        self._kline_caches = {
+            '5m': TTLCache(maxsize=512, ttl=60),
+            '1h': TTLCache(maxsize=512, ttl=900),
+        }
+        
+        # Açık işlem anlık görüntüsü - sadece işlem açılınca/kapanınca yenilenir
+        self._open_trades_cache = None
+        self._daily_perf_cache = TTLCache(maxsize=1, ttl=60)
+        
+        # Açık işlem varken set - işlem yönetimi döngüsü boşta beklemez
+        self._has_trades = asyncio.Event()
+        
+        # (sembol, periyot) -> mum tamponu; her tick sadece yeni mumları ekler
+        self._ohlcv_cache: Dict[tuple, _CandleRing] = {}
+        
+        # İşlenmiş sinyal parmak izleri (LRU) - üst üste binen tarama pencereleri
+        self._seen_signals: OrderedDict = OrderedDict()
+        self._seen_signals_max = 4096
+        
+        # Arka plan veritabanı yazıcısı - event loop commit beklemez
+        self._db_queue: asyncio.Queue = asyncio.Queue()
+        self._db_writer_task = None
         
         # Durum
         self.running = False
@@ -64,40 +200,50 @@ class KriptoBot:
             'BTC', 'ETH', 'SOL', 'BNB', 'XRP', 'ADA', 'AVAX', 'DOGE',
             'MATIC', 'DOT', 'LINK', 'UNI', 'ATOM', 'LTC', 'FIL'
         ]
+        
+        # (coin, sembol) çiftleri bir kez üretilir - görevler f-string kurmaz
+        self.symbol_pairs = tuple((c, f"{c}_USDT") for c in self.watch_list)
+        self._symbol_map = dict(self.symbol_pairs)
     
     async def start(self):
         """Botu başlat"""
         self.running = True
+        self._db_writer_task = asyncio.create_task(self._db_writer())
         
         # Başlangıç bakiyesini kaydet
         self.daily_starting_balance = self.lbank_trader.get_available_balance()
         logger.info(f"Başlangıç bakiyesi: {self.daily_starting_balance} USDT")
         
         # Bot durumunu kaydet
-        self.db.set_bot_status('started_at', datetime.now().isoformat())
-        self.db.set_bot_status('starting_balance', str(self.daily_starting_balance))
+        self._set_status('started_at', datetime.now().isoformat())
+        self._set_status('starting_balance', str(self.daily_starting_balance))
         
-        # Scheduler görevlerini ayarla
-        self._setup_scheduler()
+        # Önceki çalışmadan kalan sinyal parmak izlerini yükle
+        self._load_seen_signals()
         
         # Telegram bağlantısı (varsa)
         telegram_connected = await self._setup_telegram()
         
-        # Scheduler'ı başlat
-        self.scheduler.start()
+        # Kapalıyken kaçan sinyaller için tek seferlik tarama; sonrası push (event handler)
+        if telegram_connected:
+            await self._check_signals_job(hours_back=2)
         
         logger.info("=" * 60)
         logger.info("KriptoBot aktif!")
-        logger.info(f"- Sinyal kontrolü: Her {config.SIGNAL_CHECK_INTERVAL} dakika")
+        logger.info("- Sinyal kontrolü: Anlık (Telegram event)")
         logger.info(f"- Gemini analizi: Her {config.GEMINI_ANALYSIS_INTERVAL} dakika")
         logger.info(f"- Scalper modu: Her {config.SCALPER_INTERVAL} dakika")
         logger.info(f"- Telegram: {'Bağlı' if telegram_connected else 'Bağlı değil'}")
         logger.info("=" * 60)
         
-        # Ana döngü
+        # İşlem yönetimi sadece açık işlem varken çalışır
+        if self._get_open_trades():
+            self._has_trades.set()
+        self._inflight['manage_trades_loop'] = asyncio.create_task(self._manage_trades_loop())
+        
+        # Ana döngü - tüm periyodik görevler tek tick döngüsünde
         try:
-            while self.running:
-                await asyncio.sleep(1)
+            await self._tick_loop()
         except KeyboardInterrupt:
             await self.stop()
     
@@ -109,77 +255,157 @@ class KriptoBot:
         # Günlük performansı kaydet
         await self._save_daily_performance()
         
-        # Scheduler'ı durdur
-        self.scheduler.shutdown(wait=False)
+        # Çalışan periyodik görevleri iptal et
+        for task in list(self._inflight.values()):
+            task.cancel()
         
         # Telegram bağlantısını kapat
-        await self.telegram.disconnect()
+        if self.telegram:
+            await self.telegram.disconnect()
         
         # Bot durumunu güncelle
-        self.db.set_bot_status('stopped_at', datetime.now().isoformat())
-        
-        logger.info("Bot durduruldu.")
-    
-    def _setup_scheduler(self):
-        """Zamanlayıcı görevlerini ayarla"""
-        
-        # 30 dakikada bir sinyal kontrolü
-        self.scheduler.add_job(
-            self._check_signals_job,
-            IntervalTrigger(minutes=config.SIGNAL_CHECK_INTERVAL),
-            id='signal_check',
-            name='Sinyal Kontrolü',
-            max_instances=1
-        )
-        
-        # 1 saatte bir Gemini analizi
-        self.scheduler.add_job(
-            self._gemini_analysis_job,
-            IntervalTrigger(minutes=config.GEMINI_ANALYSIS_INTERVAL),
-            id='gemini_analysis',
-            name='Gemini Analizi',
-            max_instances=1
-        )
-        
-        # 1 saatte bir scalper modu
-        self.scheduler.add_job(
-            self._scalper_job,
-            IntervalTrigger(minutes=config.SCALPER_INTERVAL),
-            id='scalper',
-            name='Scalper Modu',
-            max_instances=1
-        )
+        self._set_status('stopped_at', datetime.now().isoformat())
+        self._set_status('seen_signals_blob', json.dumps(list(self._seen_signals)))
         
-        # Her 5 dakikada açık işlemleri kontrol et
-        self.scheduler.add_job(
-            self._manage_trades_job,
-            IntervalTrigger(minutes=5),
-            id='trade_management',
-            name='İşlem Yönetimi',
-            max_instances=1
-        )
+        # Kuyrukta kalan yazmaları boşalt
+        if self._db_writer_task:
+            await self._db_writer_task
         
-        # Her gün gece yarısı günlük rapor
-        self.scheduler.add_job(
-            self._daily_report_job,
-            CronTrigger(hour=0, minute=0),
-            id='daily_report',
-            name='Günlük Rapor',
-            max_instances=1
-        )
+        # HTTP bağlantı havuzunu kapat
+        self.lbank_api.close()
         
-        # Her 1 dakikada sağlık kontrolü
-        self.scheduler.add_job(
-            self._health_check_job,
-            IntervalTrigger(minutes=1),
-            id='health_check',
-            name='Sağlık Kontrolü',
-            max_instances=1
-        )
+        logger.info("Bot durduruldu.")
+    
+    def _set_status(self, key: str, value: str):
+        """Bot durumunu arka plan yazıcı kuyruğuna ekle"""
+        self._db_queue.put_nowait(('set_status', key, value))
+    
+    async def _db_writer(self):
+        """Kuyruktaki yazmaları toplu halde tek transaction'da işle"""
+        batch = []
+        while self.running or not self._db_queue.empty():
+            try:
+                batch.append(await asyncio.wait_for(self._db_queue.get(), 0.5))
+                while not self._db_queue.empty():
+                    batch.append(self._db_queue.get_nowait())
+            except asyncio.TimeoutError:
+                pass
+            
+            if batch:
+                try:
+                    await asyncio.to_thread(self.db.execute_many, batch)
+                except Exception as e:
+                    logger.error(f"Toplu veritabanı yazma hatası: {e}")
+                batch.clear()
+    
+    @staticmethod
+    def _seconds_until_midnight() -> float:
+        """Bir sonraki gece yarısına kalan süre (günlük rapor için)"""
+        now = datetime.now()
+        midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return (midnight - now).total_seconds()
+    
+    async def _tick_loop(self):
+        """
+        Periyodik görevleri tek döngüde çalıştır
+        Her görevin bir sonraki çalışma zamanı monotonic saatle tutulur
+        """
+        intervals = {
+            'gemini_analysis': config.GEMINI_ANALYSIS_INTERVAL * 60,  # Gemini analizi
+            'scalper': config.SCALPER_INTERVAL * 60,               # Scalper modu
+            'health_check': 60,                                    # Sağlık kontrolü
+        }
+        now = time.monotonic()
+        next_run = {name: now + interval for name, interval in intervals.items()}
+        next_run['daily_report'] = now + self._seconds_until_midnight()  # Her gün gece yarısı
+        
+        while self.running:
+            now = time.monotonic()
+            for name, due in next_run.items():
+                if due > now:
+                    continue
+                
+                # Önceki çalışma bitmediyse bu turu atla (max_instances=1)
+                if name not in self._inflight:
+                    self._inflight[name] = asyncio.create_task(self._run_job(name))
+                
+                if name == 'daily_report':
+                    next_run[name] = now + self._seconds_until_midnight()
+                else:
+                    next_run[name] = now + intervals[name]
+            
+            # Sıradaki göreve kadar uyu (durdurma isteğine en geç 1 sn'de tepki ver)
+            await asyncio.sleep(min(1.0, max(0.0, min(next_run.values()) - time.monotonic())))
+    
+    async def _run_job(self, name: str):
+        """Periyodik görevi çalıştır ve bitince kaydını sil"""
+        try:
+            await getattr(self, f'_{name}_job')()
+        except Exception as e:
+            logger.error(f"Görev hatası ({name}): {e}")
+        finally:
+            self._inflight.pop(name, None)
+    
+    def _get_open_trades(self) -> list:
+        """Açık işlemler (önbellek geçersizse DB'den yenilenir)"""
+        if self._open_trades_cache is None:
+            self._open_trades_cache = self.db.get_open_trades()
+        return self._open_trades_cache
+    
+    def _invalidate_open_trades(self):
+        """İşlem durumunu değiştiren her adımdan sonra çağrılır"""
+        self._open_trades_cache = None
+    
+    def _get_daily_performance(self):
+        """Günlük performans (60 sn önbellekli)"""
+        if 'daily' not in self._daily_perf_cache:
+            self._daily_perf_cache['daily'] = self.db.get_daily_performance()
+        return self._daily_perf_cache['daily']
+    
+    def _load_seen_signals(self):
+        """Kayıtlı sinyal parmak izlerini veritabanından yükle"""
+        try:
+            blob = self.db.get_bot_status('seen_signals_blob')
+            if blob:
+                for fp in json.loads(blob)[-self._seen_signals_max:]:
+                    self._seen_signals[tuple(fp)] = None
+        except Exception as e:
+            logger.warning(f"Sinyal parmak izleri yüklenemedi: {e}")
+    
+    def _mark_seen(self, signal) -> bool:
+        """Sinyal daha önce işlendiyse True, değilse kaydet ve False döndür"""
+        fp = (signal.channel_id, signal.message_id)
+        if fp in self._seen_signals:
+            self._seen_signals.move_to_end(fp)
+            return True
+        self._seen_signals[fp] = None
+        if len(self._seen_signals) > self._seen_signals_max:
+            self._seen_signals.popitem(last=False)
+        return False
+    
+    def _execute_trade(self, decision) -> dict:
+        """İşlemi aç ve açık işlem önbelleğini geçersiz kıl"""
+        try:
+            return self.strategy.execute_trade(decision)
+        finally:
+            self._invalidate_open_trades()
+    
+    async def _execute_trade_async(self, decision) -> dict:
+        """İşlemi LBank hız sınırı altında executor'da aç"""
+        async with self.lbank_limit:
+            result = await asyncio.to_thread(self._execute_trade, decision)
+        if result.get('success'):
+            self._has_trades.set()
+        return result
+    
+    @property
+    def gemini(self) -> 'GeminiAnalyzer':
+        """Gemini analizörü - google.generativeai ilk kullanımda yüklenir"""
+        return self.strategy.gemini  # Strateji ile aynı örnek paylaşılır
     
     async def _setup_telegram(self) -> bool:
         """Telegram bağlantısını kur"""
-        if not config.TELEGRAM_API_ID or not config.TELEGRAM_API_HASH:
+        if self.telegram is None or not config.TELEGRAM_API_HASH:
             logger.warning("Telegram API bilgileri eksik - sinyal dinleyici devre dışı")
             return False
         
@@ -191,69 +417,149 @@ class KriptoBot:
         
         return connected
     
-    async def _on_new_signal(self, signal: TradingSignal):
+    async def _on_new_signal(self, signal: 'TradingSignal'):
         """Yeni sinyal geldiğinde çağrılır"""
+        if self._mark_seen(signal):
+            return
+        
         logger.info(f"🔔 Yeni sinyal: {signal.coin} {signal.side} (Kaynak: {signal.source})")
         
         # Strateji ile işle
         decision = self.strategy.process_telegram_signal(signal)
         
         if decision.should_trade:
-            result = self.strategy.execute_trade(decision)
+            result = await self._execute_trade_async(decision)
             logger.info(f"İşlem sonucu: {result}")
         else:
             logger.info(f"İşlem atlandı: {decision.reason}")
     
-    async def _check_signals_job(self):
-        """Sinyal kontrol görevi"""
+    async def _check_signals_job(self, hours_back: float = 0.5):
+        """Geçmiş mesajları tara (başlangıçta kaçan sinyalleri yakalamak için)"""
         logger.info("📡 Sinyal kontrolü başlıyor...")
         
         try:
             # Telegram kanallarını tara
-            if self.telegram.client:
-                signals = await self.telegram.scan_channels(hours_back=0.5)  # Son 30 dk
+            if self.telegram and self.telegram.client:
+                signals = await self.telegram.scan_channels(hours_back=hours_back)
+                
+                # Taranan sinyaller tek batch'te işlenir (toplu INSERT, tek Gemini isteği)
+                batch = [signal for signal in signals
+                         if not self._mark_seen(signal) and signal.confidence >= 0.6]
+                decisions = await asyncio.to_thread(self.strategy.process_telegram_signals_batch, batch)
                 
-                for signal in signals:
-                    if signal.confidence >= 0.6:
-                        decision = self.strategy.process_telegram_signal(signal)
-                        
-                        if decision.should_trade:
-                            result = self.strategy.execute_trade(decision)
-                            logger.info(f"Sinyal işlendi: {signal.coin} -> {result}")
-                            await asyncio.sleep(2)  # Rate limit koruması
+                for signal, decision in zip(batch, decisions):
+                    if decision.should_trade:
+                        result = await self._execute_trade_async(decision)
+                        logger.info(f"Sinyal işlendi: {signal.coin} -> {result}")
             
             logger.info("✅ Sinyal kontrolü tamamlandı")
             
         except Exception as e:
             logger.error(f"Sinyal kontrolü hatası: {e}")
     
+    async def _fetch_klines(self, symbol: str, interval: str, limit: int = 100,
+                            refresh: bool = False) -> dict:
+        """
+        Mum verisini executor'da çek (eşzamanlılık semaphore ile sınırlı)
+        Aynı mum periyodu içinde tekrar istenirse önbellekten döner
+        """
+        cache = self._kline_caches.get(interval)
+        key = (symbol, limit)
+        if cache is not None and not refresh:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        
+        async with self._klines_sem, self.lbank_limit:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                None, self.lbank_api.futures_get_kline, symbol, interval, limit
+            )
+        
+        if cache is not None and result['success']:
+            cache[key] = result
+        return result
+    
+    def _update_ohlcv(self, symbol: str, interval: str, data) -> Optional[np.ndarray]:
+        """Mum verisini sembol tamponuna işle ve (n, 6) görünümünü döndür"""
+        arr = _parse_klines(data)
+        if arr is None:
+            return None
+        ring = self._ohlcv_cache.get((symbol, interval))
+        if ring is None:
+            # 5m tamponu 100 saatlik veriyi tutar, 1h mumları buradan türetilebilir
+            cap = 1200 if interval == '5m' else 200
+            ring = self._ohlcv_cache[(symbol, interval)] = _CandleRing(cap)
+        ring.extend(arr)
+        return ring.view()
+    
+    def _derive_1h(self, symbol: str, max_age: float = 60.0) -> Optional[np.ndarray]:
+        """Taze ve yeterli 5m tamponu varsa 1h mumları yerelde türet (HTTP yok)"""
+        ring = self._ohlcv_cache.get((symbol, '5m'))
+        if (ring is None or min(ring.count, ring.cap) < _SEED_5M
+                or time.monotonic() - ring.updated > max_age):
+            return None
+        return _resample_5m_to_1h(ring.view())
+    
+    async def _refresh_5m(self, pairs: list) -> Dict[str, Optional[np.ndarray]]:
+        """
+        5m mumlarını paralel çekip tamponlara işle (coin -> (n, 6) görünüm)
+        Tamponu henüz 1h türetmeye yetmeyen semboller için tek seferlik uzun çekim yapılır
+        """
+        def limit(symbol):
+            ring = self._ohlcv_cache.get((symbol, '5m'))
+            return 100 if ring is not None and min(ring.count, ring.cap) >= _SEED_5M else _SEED_5M
+        
+        results = await asyncio.gather(
+            *(self._fetch_klines(symbol, '5m', limit(symbol)) for _, symbol in pairs),
+            return_exceptions=True
+        )
+        
+        out = {}
+        for (coin, symbol), price_data in zip(pairs, results):
+            if isinstance(price_data, Exception) or not price_data['success']:
+                out[coin] = None
+                continue
+            out[coin] = self._update_ohlcv(symbol, '5m', price_data.get('data'))
+        return out
+    
     async def _gemini_analysis_job(self):
         """Gemini analiz görevi (saatlik)"""
         logger.info("🤖 Gemini analizi başlıyor...")
         
         try:
-            for coin in self.watch_list[:5]:  # İlk 5 coin
-                symbol = f"{coin}_USDT"
-                
-                # Fiyat verisi al
-                price_data = self.lbank_api.futures_get_kline(symbol, '1h', 100)
-                
-                if not price_data['success']:
-                    continue
-                
-                prices = []
-                volumes = []
-                
-                for candle in price_data.get('data', []):
-                    if isinstance(candle, list) and len(candle) >= 6:
-                        prices.append(float(candle[4]))  # Close
-                        volumes.append(float(candle[5]))  # Volume
+            pairs = self.symbol_pairs[:5]  # İlk 5 coin
+            
+            # Önce 5m tamponları tazelenir (scalper ile aynı önbellek); yeterli olanlardan
+            # 1h mumları yerelde türetilir ve 1h HTTP isteği atlanır
+            await self._refresh_5m(pairs)
+            derived = {coin: self._derive_1h(symbol) for coin, symbol in pairs}
+            missing = [(coin, symbol) for coin, symbol in pairs if derived[coin] is None]
+            
+            # Eksik fiyat verilerini paralel al
+            results = await asyncio.gather(
+                *(self._fetch_klines(symbol, '1h', 100) for _, symbol in missing),
+                return_exceptions=True
+            )
+            fetched = {coin: result for (coin, _), result in zip(missing, results)}
+            
+            for coin, symbol in pairs:
+                ohlcv = derived[coin]
+                if ohlcv is None:
+                    price_data = fetched[coin]
+                    if isinstance(price_data, Exception) or not price_data['success']:
+                        continue
+                    ohlcv = self._update_ohlcv(symbol, '1h', price_data.get('data'))
                 
-                if len(prices) < 50:
+                if ohlcv is None or len(ohlcv) < _MIN_1H_CANDLES:
                     continue
+                prices, volumes = ohlcv[:, 4], ohlcv[:, 5]  # Close, Volume
                 
                 # Gemini analizi
-                analysis = self.gemini.analyze_coin(coin, prices, volumes)
+                async with self.gemini_limit:
+                    analysis = await asyncio.to_thread(
+                        self.gemini.analyze_coin, coin, prices, volumes
+                    )
                 
                 logger.info(f"Gemini {coin}: {analysis.recommendation} ({analysis.confidence:.0%})")
                 
@@ -261,10 +567,8 @@ class KriptoBot:
                 decision = self.strategy.process_gemini_analysis(analysis)
                 
                 if decision.should_trade and decision.confidence >= 0.7:
-                    result = self.strategy.execute_trade(decision)
+                    result = await self._execute_trade_async(decision)
                     logger.info(f"Gemini işlemi: {coin} -> {result}")
-                
-                await asyncio.sleep(3)  # Rate limit
             
             logger.info("✅ Gemini analizi tamamlandı")
             
@@ -278,50 +582,38 @@ class KriptoBot:
         try:
             # En iyi fırsatları ara
             opportunities = []
+            pairs = self.symbol_pairs[:10]
             
-            for coin in self.watch_list[:10]:
-                symbol = f"{coin}_USDT"
-                
-                # Kısa vadeli fiyat verisi
-                price_data = self.lbank_api.futures_get_kline(symbol, '5m', 100)
-                
-                if not price_data['success']:
-                    continue
-                
-                prices = []
-                volumes = []
-                
-                for candle in price_data.get('data', []):
-                    if isinstance(candle, list) and len(candle) >= 6:
-                        prices.append(float(candle[4]))
-                        volumes.append(float(candle[5]))
-                
-                if len(prices) < 30:
+            # Kısa vadeli fiyat verilerini paralel al
+            ohlcv_map = await self._refresh_5m(pairs)
+            
+            for coin, _ in pairs:
+                ohlcv = ohlcv_map[coin]
+                if ohlcv is None or len(ohlcv) < 30:
                     continue
+                ohlcv = ohlcv[-100:]  # Scalper son 100 mumla çalışır (tampon 1h için daha uzun)
+                prices, volumes = ohlcv[:, 4], ohlcv[:, 5]
                 
                 # Scalper analizi
-                analysis = self.gemini.scalper_analysis(coin, prices, volumes)
+                async with self.gemini_limit:
+                    analysis = await asyncio.to_thread(
+                        self.gemini.scalper_analysis, coin, prices, volumes
+                    )
                 
                 if analysis.recommendation != 'HOLD' and analysis.confidence >= 0.7:
-                    opportunities.append({
-                        'coin': coin,
-                        'analysis': analysis
-                    })
-                
-                await asyncio.sleep(2)
+                    opportunities.append(analysis)
             
             # En iyi fırsatı işle
             if opportunities:
-                # Güvene göre sırala
-                opportunities.sort(key=lambda x: x['analysis'].confidence, reverse=True)
-                best = opportunities[0]
+                # En yüksek güvenli fırsat
+                best = max(opportunities, key=attrgetter('confidence'))
                 
-                logger.info(f"Scalp fırsatı: {best['coin']} ({best['analysis'].confidence:.0%})")
+                logger.info(f"Scalp fırsatı: {best.coin} ({best.confidence:.0%})")
                 
-                decision = self.strategy.process_gemini_analysis(best['analysis'])
+                decision = self.strategy.process_gemini_analysis(best)
                 
                 if decision.should_trade:
-                    result = self.strategy.execute_trade(decision)
+                    result = await self._execute_trade_async(decision)
                     logger.info(f"Scalp işlemi: {result}")
             else:
                 logger.info("Scalp fırsatı bulunamadı")
@@ -334,18 +626,19 @@ class KriptoBot:
     async def _manage_trades_job(self):
         """Açık işlemleri yönet"""
         try:
-            open_trades = self.db.get_open_trades()
+            open_trades = self._get_open_trades()
             
             if not open_trades:
+                self._has_trades.clear()
                 return
             
             logger.debug(f"Açık işlem sayısı: {len(open_trades)}")
             
             for trade in open_trades:
-                symbol = f"{trade['coin']}_USDT"
+                symbol = self._symbol_map.get(trade['coin']) or f"{trade['coin']}_USDT"
                 
                 # Güncel fiyat al
-                price_result = self.lbank_api.futures_get_market_price(symbol)
+                price_result = await asyncio.to_thread(self.lbank_api.futures_get_market_price, symbol)
                 
                 if not price_result['success']:
                     continue
@@ -355,18 +648,44 @@ class KriptoBot:
                 if current_price == 0:
                     continue
                 
-                # TP kontrolü
-                tp_result = self.tp_manager.check_and_execute_tp(trade, current_price)
+                # TP kontrolü (borsa + DB çağrıları - event loop'u bloklamasın)
+                tp_result = await asyncio.to_thread(
+                    self.tp_manager.check_and_execute_tp, trade, current_price
+                )
                 
                 if tp_result:
+                    self._invalidate_open_trades()
                     logger.info(f"TP{tp_result['tp_level']}: {trade['coin']} @ {current_price}")
             
-            # Genel işlem yönetimi
-            self.strategy.manage_open_trades()
+            # Genel işlem yönetimi (SL/TP ile işlem kapatabilir)
+            try:
+                await asyncio.to_thread(self.strategy.manage_open_trades)
+            finally:
+                self._invalidate_open_trades()
+            
+            if not self._get_open_trades():
+                self._has_trades.clear()
             
         except Exception as e:
             logger.error(f"İşlem yönetimi hatası: {e}")
     
+    async def _manage_trades_loop(self):
+        """
+        Açık işlem olduğu sürece 5 dakikada bir işlem yönetimi
+        Bekleme sırasında yeni işlem açılırsa (_has_trades set) tur hemen çalışır
+        """
+        while self.running:
+            await self._has_trades.wait()
+            await self._manage_trades_job()
+            if not self._has_trades.is_set():
+                continue  # Açık işlem kalmadı - bir sonraki işleme kadar bekle
+            
+            self._has_trades.clear()
+            try:
+                await asyncio.wait_for(self._has_trades.wait(), timeout=5 * 60)
+            except asyncio.TimeoutError:
+                self._has_trades.set()
+    
     async def _daily_report_job(self):
         """Günlük rapor oluştur"""
         logger.info("📊 Günlük rapor hazırlanıyor...")
@@ -421,10 +740,10 @@ class KriptoBot:
             ticker = self.lbank_api.get_ticker('btc_usdt')
             
             if ticker['success']:
-                self.db.set_bot_status('last_health_check', datetime.now().isoformat())
-                self.db.set_bot_status('api_status', 'OK')
+                self._set_status('last_health_check', datetime.now().isoformat())
+                self._set_status('api_status', 'OK')
             else:
-                self.db.set_bot_status('api_status', 'ERROR')
+                self._set_status('api_status', 'ERROR')
                 logger.warning("LBank API bağlantı sorunu!")
                 
         except Exception as e:
@@ -450,6 +769,8 @@ class KriptoBot:
     def manual_signal(self, coin: str, side: str, entry: float, 
                      take_profits: List[float], stop_loss: float):
         """Manuel sinyal girişi"""
+        from telegram_signals import ManualSignalInput
+        
         signal = ManualSignalInput.create_signal(
             coin=coin,
             side=side,
@@ -461,15 +782,15 @@ class KriptoBot:
         decision = self.strategy.process_telegram_signal(signal)
         
         if decision.should_trade:
-            return self.strategy.execute_trade(decision)
+            return self._execute_trade(decision)
         
         return {'success': False, 'reason': decision.reason}
     
     def get_status(self) -> dict:
         """Bot durumunu al"""
         balance = self.lbank_trader.get_available_balance()
-        open_trades = self.db.get_open_trades()
-        daily_perf = self.db.get_daily_performance()
+        open_trades = self._get_open_trades()
+        daily_perf = self._get_daily_performance()
         
         return {
             'running': self.running,
@@ -2,14 +2,38 @@
 Position Manager - Trailing Stop Sistemi
 %20 kârda SL entry'ye, her %20 artışta SL yukarı taşınır
 """
+import asyncio
 import time
 from datetime import datetime
+import numpy as np
 from loguru import logger
 from bybit_api import BybitAPI, BybitTrader
 import config
 
 logger.add("position_manager.log", rotation="1 day", retention="7 days")
 
+# Pozisyon durumu satır düzeni (side: Long=1, Short=-1)
+_POS_DTYPE = np.dtype([
+    ('entry', np.float64),       # Giriş fiyatı
+    ('size', np.float64),        # İlk pozisyon büyüklüğü
+    ('sl_lvl', np.float64),      # Mevcut SL seviyesi (0, 20, 40, 60...)
+    ('hi_pnl', np.float64),      # En yüksek PnL
+    ('side', np.int8),
+    ('created_at', np.float64),  # Unix zamanı
+])
+
+
+def _pnl_percent_vec(entry: np.ndarray, current: np.ndarray, sign: np.ndarray,
+                     leverage: np.ndarray) -> np.ndarray:
+    """calculate_pnl_percent'in vektörel hali (sign: Long=1, Short=-1)"""
+    return sign * ((current - entry) / entry) * 100 * leverage
+
+
+def _sl_price_vec(entry: np.ndarray, sl_level: np.ndarray, sign: np.ndarray,
+                  leverage: np.ndarray) -> np.ndarray:
+    """calculate_sl_price'ın vektörel hali (sign: Long=1, Short=-1)"""
+    return entry * (1 + sign * (sl_level / leverage) / 100)
+
 
 class PositionManager:
     """Pozisyon yönetimi - Trailing Stop"""
@@ -18,28 +42,53 @@ class PositionManager:
         self.api = BybitAPI()
         self.trader = BybitTrader()
         self.trailing_step = 20  # Her %20'de SL güncelle
-        self.positions_state = {}  # Pozisyon durumları
+        
+        # Pozisyon durumları: önceden ayrılmış yapısal dizi + key -> satır indeksi
+        self._pos_arr = np.zeros(256, dtype=_POS_DTYPE)
+        self._pos_index = {}
+        self._pos_keys = []  # Satır -> (symbol, side)
+        
+        # Sembol başına son durum logu (monotonic)
+        self._last_log = {}
+        self._log_interval = 60.0
+    
+    @property
+    def positions_state(self) -> dict:
+        """Pozisyon durumlarının dict görünümü (loglama/uyumluluk için)"""
+        return {
+            f"{symbol}_{side}": {
+                'symbol': symbol,
+                'side': side,
+                'entry_price': float(row['entry']),
+                'original_size': float(row['size']),
+                'current_sl_level': int(row['sl_lvl']),
+                'highest_pnl_percent': float(row['hi_pnl']),
+                'created_at': datetime.fromtimestamp(row['created_at'])
+            }
+            for (symbol, side), row in zip(self._pos_keys, self._pos_arr[:len(self._pos_keys)])
+        }
     
     def get_position_key(self, pos):
         """Pozisyon için unique key"""
         return f"{pos['symbol']}_{pos['side']}"
     
-    def initialize_position_state(self, pos):
-        """Yeni pozisyon için state oluştur"""
+    def initialize_position_state(self, pos) -> int:
+        """Yeni pozisyon için state satırı oluştur, satır indeksini döndür"""
         key = self.get_position_key(pos)
-        if key not in self.positions_state:
+        slot = self._pos_index.get(key)
+        if slot is None:
+            slot = len(self._pos_keys)
+            if slot == len(self._pos_arr):
+                # Dolunca kapasiteyi ikiye katla
+                self._pos_arr = np.concatenate((self._pos_arr, np.zeros_like(self._pos_arr)))
+            
             entry_price = float(pos.get('avgPrice') or pos.get('entry_price', 0))
-            self.positions_state[key] = {
-                'symbol': pos['symbol'],
-                'side': pos['side'],
-                'entry_price': entry_price,
-                'original_size': float(pos['size']),
-                'current_sl_level': 0,  # Mevcut SL seviyesi (0, 20, 40, 60...)
-                'highest_pnl_percent': 0,  # En yüksek PnL
-                'created_at': datetime.now()
-            }
+            self._pos_arr[slot] = (entry_price, float(pos['size']), 0, 0,
+                                   1 if pos['side'] == 'Buy' else -1, time.time())
+            self._pos_index[key] = slot
+            self._pos_keys.append((pos['symbol'], pos['side']))
             logger.info(f"📌 Yeni pozisyon takibe alındı: {pos['symbol']} {pos['side']} @ {entry_price}")
-        return self.positions_state[key]
+        return slot
     
     def calculate_pnl_percent(self, entry_price: float, current_price: float, side: str, leverage: int = 20) -> float:
         """PnL yüzdesini hesapla (kaldıraçlı)"""
@@ -81,71 +130,79 @@ class PositionManager:
             logger.error(f"❌ SL güncelleme hatası: {e}")
             return False
     
-    def check_positions(self):
+    async def check_positions(self):
         """Tüm pozisyonları kontrol et ve trailing stop uygula"""
         try:
-            positions = self.trader.get_all_positions()
+            # Bloklayan API çağrıları event loop'u dondurmasın diye thread'e alınır
+            positions = await asyncio.to_thread(self.trader.get_all_positions)
             
             if not positions:
                 return
             
+            # Geçerli pozisyonları ve state'lerini topla
+            rows = []
             for pos in positions:
-                symbol = pos['symbol']
-                side = pos['side']
                 current_price = float(pos.get('markPrice') or pos.get('mark_price', 0))
                 size = float(pos['size'])
                 
                 if size == 0 or current_price == 0:
                     continue
                 
-                # State'i al veya oluştur
-                state = self.initialize_position_state(pos)
-                entry_price = state['entry_price']
-                
-                if entry_price == 0:
+                # State satırını al veya oluştur
+                slot = self.initialize_position_state(pos)
+                if self._pos_arr['entry'][slot] == 0:
                     continue
                 
-                # Kaldıracı al
                 leverage = int(float(pos.get('leverage', 20)))
+                rows.append((pos['symbol'], pos['side'], current_price, leverage, slot))
+            
+            if not rows:
+                return
+            
+            # PnL ve hedef SL seviyeleri tek vektör işlemiyle (kaldıraçlı)
+            slots = np.fromiter((row[4] for row in rows), np.intp, len(rows))
+            state = self._pos_arr[slots]  # Tek seferde kopya; yazmalar aşağıda geri döner
+            entry = state['entry']
+            current = np.fromiter((row[2] for row in rows), np.float64, len(rows))
+            leverage = np.fromiter((row[3] for row in rows), np.float64, len(rows))
+            sign = state['side'].astype(np.float64)
+            current_lvl = state['sl_lvl']
+            
+            pnl = _pnl_percent_vec(entry, current, sign, leverage)
+            
+            # Hangi SL seviyesinde olmalı? (0, 20, 40, 60...) - minimum 0 (entry)
+            target = np.maximum(0, (pnl // self.trailing_step) * self.trailing_step)
+            new_sl = _sl_price_vec(entry, target, sign, leverage)
+            
+            # En yüksek PnL'i güncelle
+            self._pos_arr['hi_pnl'][slots] = np.maximum(state['hi_pnl'], pnl)
+            
+            # Sadece SL seviyesi yükselmesi gereken satırlar API'ye gider
+            for i in np.flatnonzero((target > current_lvl) & (pnl >= self.trailing_step)).tolist():
+                symbol, side, _, lev, slot = rows[i]
+                entry_price = float(entry[i])
+                pnl_percent = float(pnl[i])
+                old_sl_level = int(current_lvl[i])
+                new_sl_level = int(target[i])
+                new_sl_price = float(new_sl[i])
                 
-                # PnL hesapla (kaldıraçlı)
-                pnl_percent = self.calculate_pnl_percent(entry_price, current_price, side, leverage)
-                
-                # En yüksek PnL'i güncelle
-                if pnl_percent > state['highest_pnl_percent']:
-                    state['highest_pnl_percent'] = pnl_percent
-                
-                # Hangi SL seviyesinde olmalı? (0, 20, 40, 60...)
-                target_sl_level = (int(pnl_percent // self.trailing_step)) * self.trailing_step
-                
-                # Minimum 0 (entry) - negatif olamaz
-                target_sl_level = max(0, target_sl_level)
-                
-                # SL seviyesi yükselmeli mi?
-                if target_sl_level > state['current_sl_level'] and pnl_percent >= self.trailing_step:
-                    old_sl_level = state['current_sl_level']
-                    new_sl_level = target_sl_level
-                    
-                    # Yeni SL fiyatını hesapla (kaldıraç dahil)
-                    new_sl_price = self.calculate_sl_price(entry_price, new_sl_level, side, leverage)
-                    
-                    # Eğer %20'ye ulaştıysa ve SL henüz entry'de değilse
-                    if old_sl_level == 0 and new_sl_level >= self.trailing_step:
-                        # İlk olarak SL'yi entry'ye çek
-                        sl_entry = self.calculate_sl_price(entry_price, 0, side, leverage)
-                        logger.info(f"""
+                # Eğer %20'ye ulaştıysa ve SL henüz entry'de değilse
+                if old_sl_level == 0 and new_sl_level >= self.trailing_step:
+                    # İlk olarak SL'yi entry'ye çek
+                    sl_entry = self.calculate_sl_price(entry_price, 0, side, lev)
+                    logger.info(f"""
 🔒 {symbol} - SL ENTRY'YE ÇEKİLDİ!
    PnL: {pnl_percent:.2f}%
    Entry: ${entry_price:.4f}
    SL: ${sl_entry:.4f} (başabaş)
 """)
-                        self.update_stop_loss(symbol, sl_entry)
-                        state['current_sl_level'] = 0
-                        time.sleep(1)
-                    
-                    # Şimdi gerçek SL seviyesini ayarla
-                    if new_sl_level > 0:
-                        logger.info(f"""
+                    await asyncio.to_thread(self.update_stop_loss, symbol, sl_entry)
+                    self._pos_arr['sl_lvl'][slot] = 0
+                    await asyncio.sleep(1)  # İki SL güncellemesi arasında borsaya 1 sn ver
+                
+                # Şimdi gerçek SL seviyesini ayarla
+                if new_sl_level > 0:
+                    logger.info(f"""
 📈 {symbol} - SL YÜKSELTİLDİ!
    PnL: {pnl_percent:.2f}%
    Entry: ${entry_price:.4f}
@@ -153,28 +210,26 @@ class PositionManager:
    Yeni SL Seviyesi: %{new_sl_level}
    Yeni SL Fiyat: ${new_sl_price:.4f}
 """)
-                        if self.update_stop_loss(symbol, new_sl_price):
-                            state['current_sl_level'] = new_sl_level
-                            logger.success(f"✅ {symbol} SL güncellendi: ${new_sl_price:.4f} (+%{new_sl_level})")
-                        else:
-                            logger.error(f"❌ {symbol} SL güncellenemedi")
-                
+                    if await asyncio.to_thread(self.update_stop_loss, symbol, new_sl_price):
+                        self._pos_arr['sl_lvl'][slot] = new_sl_level
+                        logger.success(f"✅ {symbol} SL güncellendi: ${new_sl_price:.4f} (+%{new_sl_level})")
+                    else:
+                        logger.error(f"❌ {symbol} SL güncellenemedi")
+            
+            for (symbol, side, _, _, slot), pnl_percent in zip(rows, pnl.tolist()):
                 # Durumu logla (her 60 saniyede bir)
-                if hasattr(self, '_last_log') and symbol in self._last_log:
-                    if time.time() - self._last_log[symbol] < 60:
-                        continue
-                
-                if not hasattr(self, '_last_log'):
-                    self._last_log = {}
-                self._last_log[symbol] = time.time()
+                now = time.monotonic()
+                if now - self._last_log.get(symbol, -self._log_interval) < self._log_interval:
+                    continue
+                self._last_log[symbol] = now
                 
-                logger.info(f"📊 {symbol} | {side} | PnL: {pnl_percent:+.2f}% | SL Level: %{state['current_sl_level']}")
+                logger.info(f"📊 {symbol} | {side} | PnL: {pnl_percent:+.2f}% | SL Level: %{int(self._pos_arr['sl_lvl'][slot])}")
                 
         except Exception as e:
             logger.error(f"❌ Position check hatası: {e}")
     
-    def run(self, interval_seconds: int = 10):
-        """Position manager'ı başlat"""
+    def log_banner(self, interval_seconds: int = 10):
+        """Başlangıç bilgisini logla"""
         logger.info(f"""
 ╔══════════════════════════════════════════════════════════════╗
 ║          📊 TRAILING STOP YÖNETİCİSİ BAŞLADI                ║
@@ -191,22 +246,33 @@ class PositionManager:
 """)
         
         logger.info(f"⏱️ Kontrol aralığı: {interval_seconds} saniye")
+    
+    async def check_once(self):
+        """Tek kontrol turu - zamanlamayı çağıran taraf (APScheduler) yönetir"""
+        await self.check_positions()
+    
+    async def run(self, interval_seconds: int = 10):
+        """Position manager'ı kendi döngüsüyle başlat"""
+        self.log_banner(interval_seconds)
         
         while True:
             try:
-                self.check_positions()
-                time.sleep(interval_seconds)
-            except KeyboardInterrupt:
+                await self.check_once()
+                await asyncio.sleep(interval_seconds)
+            except asyncio.CancelledError:
                 logger.info("⏹️ Position manager durduruldu")
-                break
+                raise
             except Exception as e:
                 logger.error(f"❌ Hata: {e}")
-                time.sleep(30)
+                await asyncio.sleep(30)
 
 
 def main():
     manager = PositionManager()
-    manager.run(interval_seconds=10)  # Her 10 saniyede kontrol
+    try:
+        asyncio.run(manager.run(interval_seconds=10))  # Her 10 saniyede kontrol
+    except KeyboardInterrupt:
+        logger.info("⏹️ Position manager durduruldu")
 
 
 if __name__ == "__main__":
@@ -2,47 +2,53 @@
 KriptoBot - Ana Çalıştırıcı
 Auto Trader + Position Manager + Telegram Signals birlikte çalışır
 """
-import threading
 import asyncio
-import time
+import signal
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from loguru import logger
 
 logger.add("kriptobot.log", rotation="1 day", retention="7 days")
 
 
-def run_auto_trader():
-    """Auto trader'ı çalıştır"""
-    from auto_trader import AutoTrader
-    trader = AutoTrader()
-    trader.start()
+async def run_auto_trader(scheduler: AsyncIOScheduler):
+    """Auto trader'ı başlat ve görevlerini zamanlayıcıya ekle"""
+    try:
+        from auto_trader import AutoTrader
+        trader = AutoTrader()
+        await trader.startup()
+        
+        # Her saat başı analiz + dakikalık pozisyon/15 dk kontrolü
+        scheduler.add_job(trader.run_analysis, 'cron', minute=0,
+                          coalesce=True, max_instances=1)
+        scheduler.add_job(trader.tick, 'interval', minutes=1,
+                          coalesce=True, max_instances=1)
+    except Exception as e:
+        logger.error(f"❌ Auto trader hatası: {e}")
 
 
-def run_position_manager():
-    """Position manager'ı çalıştır"""
-    from position_manager import PositionManager
-    manager = PositionManager()
-    manager.run(interval_seconds=10)
+def run_position_manager(scheduler: AsyncIOScheduler):
+    """Position manager'ı zamanlayıcıya ekle"""
+    try:
+        from position_manager import PositionManager
+        manager = PositionManager()
+        manager.log_banner(interval_seconds=10)
+        scheduler.add_job(manager.check_once, 'interval', seconds=10,
+                          coalesce=True, max_instances=1)
+    except Exception as e:
+        logger.error(f"❌ Position manager hatası: {e}")
 
 
-def run_telegram_signals():
+async def run_telegram_signals():
     """Telegram sinyal okuyucuyu çalıştır"""
     try:
         from telegram_signals import TelegramSignalReader
-        import asyncio
-        
-        async def start_reader():
-            reader = TelegramSignalReader()
-            await reader.start()
-        
-        # Yeni event loop oluştur ve çalıştır
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(start_reader())
+        reader = TelegramSignalReader()
+        await reader.start()
     except Exception as e:
         logger.error(f"❌ Telegram sinyal okuyucu hatası: {e}")
 
 
-def main():
+async def main():
     logger.info("""
 ╔══════════════════════════════════════════════════════════════╗
 ║                    🚀 KRİPTOBOT v2.0                        ║
@@ -56,33 +62,42 @@ def main():
 ╚══════════════════════════════════════════════════════════════╝
 """)
     
-    # Thread'leri başlat
+    # Tüm servisler tek event loop'ta - periyodik işler tek zamanlayıcıda
     logger.info("🔄 Servisler başlatılıyor...")
     
-    # Position Manager - sürekli pozisyon takibi
-    pm_thread = threading.Thread(target=run_position_manager, daemon=True)
-    pm_thread.start()
-    logger.info("✅ Position Manager başlatıldı (her 10 saniye)")
+    scheduler = AsyncIOScheduler()
+    run_position_manager(scheduler)   # Position Manager - sürekli pozisyon takibi
+    scheduler.start()
     
-    # Auto Trader - saatlik analiz
-    at_thread = threading.Thread(target=run_auto_trader, daemon=True)
-    at_thread.start()
+    services = asyncio.gather(
+        run_auto_trader(scheduler),   # Auto Trader - saatlik analiz
+        run_telegram_signals()        # Telegram Sinyal Okuyucu
+    )
+    logger.info("✅ Position Manager başlatıldı (her 10 saniye)")
     logger.info("✅ Auto Trader başlatıldı (her saat)")
-    
-    # Telegram Sinyal Okuyucu
-    tg_thread = threading.Thread(target=run_telegram_signals, daemon=True)
-    tg_thread.start()
     logger.info("✅ Telegram Sinyal Okuyucu başlatıldı (Silver Trade)")
     
+    # Ctrl+C / SIGTERM ile temiz kapanış
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            # Windows - loop sinyal desteklemez, klasik handler event'i set eder
+            signal.signal(sig, lambda *_: loop.call_soon_threadsafe(stop.set))
+    
     logger.info("\n🟢 Bot aktif! Ctrl+C ile durdurun.\n")
     
-    # Ana thread'i canlı tut
-    try:
-        while True:
-            time.sleep(60)
-    except KeyboardInterrupt:
-        logger.info("\n⏹️ Bot durduruluyor...")
+    await stop.wait()
+    logger.info("\n⏹️ Bot durduruluyor...")
+    scheduler.shutdown(wait=False)
+    services.cancel()
+    await asyncio.gather(services, return_exceptions=True)
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("\n⏹️ Bot durduruluyor...")
@@ -3,6 +3,7 @@ KriptoBot - Telegram Kontrol Botu
 Telegram üzerinden bot'u kontrol et
 """
 import asyncio
+from cachetools import TTLCache
 from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes
 from loguru import logger
@@ -22,6 +23,25 @@ auto_trader = AutoTrader()
 
 logger.add("telegram_bot.log", rotation="1 day", retention="7 days")
 
+# Pozisyon + bakiye anlık görüntüsü (art arda gelen komutlar tek isteği paylaşır)
+_snapshot_cache = TTLCache(maxsize=1, ttl=2)
+
+
+async def _snapshot(refresh: bool = False):
+    """Pozisyonları ve bakiyeyi paralel çek: (positions, balance)"""
+    if not refresh:
+        cached = _snapshot_cache.get('snapshot')
+        if cached is not None:
+            return cached
+    
+    loop = asyncio.get_running_loop()
+    snapshot = await asyncio.gather(
+        loop.run_in_executor(None, trader.get_all_positions),
+        loop.run_in_executor(None, trader.get_available_balance)
+    )
+    _snapshot_cache['snapshot'] = snapshot = tuple(snapshot)
+    return snapshot
+
 
 async def is_authorized(update: Update) -> bool:
     """Kullanıcı yetkili mi kontrol et"""
@@ -65,9 +85,8 @@ async def analiz(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Analiz yap
         auto_trader.run_analysis()
         
-        # Sonuçları al
-        positions = trader.get_all_positions()
-        balance = trader.get_available_balance()
+        # Sonuçları al (analiz işlem açmış olabilir - önbelleği atla)
+        positions, balance = await _snapshot(refresh=True)
         
         if positions:
             pos_text = "\n".join([
@@ -105,8 +124,7 @@ async def durum(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     try:
-        positions = trader.get_all_positions()
-        balance = trader.get_available_balance()
+        positions, balance = await _snapshot()
         
         if positions:
             total_pnl = sum(float(p['unrealized_pnl']) for p in positions)
@@ -145,8 +163,7 @@ async def bakiye(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     try:
-        balance = trader.get_available_balance()
-        positions = trader.get_all_positions()
+        positions, balance = await _snapshot()
         total_pnl = sum(float(p['unrealized_pnl']) for p in positions)
         
         result = f"""
@@ -172,20 +189,22 @@ async def kapat(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("🔄 Pozisyonlar kapatılıyor...")
     
     try:
-        positions = trader.get_all_positions()
+        ret = trader.close_all_positions()
         
-        if not positions:
-            await update.message.reply_text("📭 Kapatılacak pozisyon yok!")
+        if not ret['success']:
+            await update.message.reply_text(f"❌ Hata: {ret.get('error')}")
             return
         
-        results = trader.close_all_positions()
+        if not ret['positions_before']:
+            await update.message.reply_text("📭 Kapatılacak pozisyon yok!")
+            return
         
-        closed_count = len([r for r in results if r.get('result', {}).get('success')])
+        closed_count = len([r for r in ret['results'] if r.get('result', {}).get('success')])
         
         result = f"""
 ✅ *POZİSYONLAR KAPATILDI*
 
-📊 Kapatılan: {closed_count}/{len(positions)}
+📊 Kapatılan: {closed_count}/{len(ret['positions_before'])}
 """
         await update.message.reply_text(result, parse_mode='Markdown')
         
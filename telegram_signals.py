@@ -5,46 +5,47 @@ Silver Trade ve diğer kanallardan sinyalleri okur, Gemini ile analiz eder
 import asyncio
 import json
 import base64
+import hashlib
 import re
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from telethon import TelegramClient, events
 from telethon.tl.types import MessageMediaPhoto, MessageMediaDocument
-import google.generativeai as genai
 from loguru import logger
 from bybit_api import BybitTrader
 import config
+from utils import json_loads
 
-# Logger
-logger.add("telegram_signals.log", rotation="1 day", retention="7 days")
-
-# Gemini AI
-genai.configure(api_key=config.GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-2.5-flash-lite')
+# Sinyal ipuçları - hiçbiri yoksa (ve görsel yoksa) mesaj Gemini'ye gitmez
+_SIGNAL_WORDS = frozenset(
+    {'LONG', 'SHORT', 'BUY', 'SELL', 'ALIŞ', 'SATIŞ', 'TP', 'SL', 'ENTRY', 'LEVERAGE'}
+    | {f'TP{i}' for i in range(1, 10)}
+)
+_SIGNAL_EMOJIS = '📈📉🟢🔴'
 
-# Telegram Client
-client = TelegramClient(
-    'signal_session',
-    int(config.TELEGRAM_API_ID),
-    config.TELEGRAM_API_HASH
+# Büyük/küçük harf regex'te yok sayılır - mesajın upper() kopyası çıkarılmaz
+_HINT_RE = re.compile(
+    r"\b(?:" + "|".join(sorted(_SIGNAL_WORDS, key=len, reverse=True)) + r")\b"
+    + "|[" + _SIGNAL_EMOJIS + "]",
+    re.IGNORECASE,
 )
 
 
-class TelegramSignalReader:
-    """Telegram kanallarından sinyal okuyucu"""
-    
-    def __init__(self):
-        self.trader = BybitTrader()
-        self.channels = config.TELEGRAM_CHANNELS
-        self.processed_messages = set()  # Tekrar işlememek için
-        
-    async def analyze_with_gemini(self, text: str, image_data: bytes = None) -> dict:
-        """Mesajı Gemini ile analiz et"""
-        
-        prompt = f"""
-Sen profesyonel bir kripto sinyal analistisin. Aşağıdaki Telegram mesajını/görselini analiz et ve işlem sinyali çıkar.
+def _has_signal_hint(text: str) -> bool:
+    """Mesajda fiyat (rakam) ve en az bir sinyal kelimesi/emojisi var mı"""
+    # Hızlı ret: rakam yoksa regex çalışmaz
+    if not any(ch.isdigit() for ch in text):
+        return False
+    return _HINT_RE.search(text) is not None
 
-MESAJ:
-{text}
+# Gemini sinyal prompt'unun sabit kısmı - her çağrıda aynı (sunucu tarafı prefix önbelleği)
+_PROMPT_PREFIX = """
+Sen profesyonel bir kripto sinyal analistisin. Aşağıdaki Telegram mesajını/görselini analiz et ve işlem sinyali çıkar.
 
 KURALLAR:
 1. Eğer bu bir trading sinyali ise (LONG/SHORT, alım/satım, entry/giriş) bilgilerini çıkar
@@ -56,7 +57,7 @@ KURALLAR:
 7. Eğer sinyal DEĞİLSE, "is_signal": false döndür
 
 JSON FORMATI (sadece JSON, başka bir şey yazma):
-{{
+{
     "is_signal": true/false,
     "symbol": "BTCUSDT",
     "side": "LONG" veya "SHORT",
@@ -66,41 +67,129 @@ JSON FORMATI (sadece JSON, başka bir şey yazma):
     "leverage": 20,
     "confidence": 8,
     "reason": "Kısa açıklama"
-}}
+}
 
 Eğer sinyal değilse:
-{{
+{
     "is_signal": false,
     "reason": "Neden sinyal değil"
-}}
+}
 """
+
+# Logger
+logger.add("telegram_signals.log", rotation="1 day", retention="7 days")
+
+
+@lru_cache(maxsize=1)
+def _get_model():
+    """Gemini modeli - google.generativeai ilk analizde yüklenir"""
+    import google.generativeai as genai
+    genai.configure(api_key=config.GEMINI_API_KEY)
+    return genai.GenerativeModel('gemini-2.5-flash-lite')
+
+
+def _extract_json(text: str) -> str:
+    """
+    Yanıttaki ilk '{' ile son '}' arasını al (kod bloğu işaretlerini atlar)
+    Regex yerine find/rfind - güvenilmeyen metinde doğrusal süre, backtracking yok
+    """
+    start = text.find('{')
+    end = text.rfind('}')
+    if start < 0 or end < start:
+        raise ValueError("Yanıtta JSON bulunamadı")
+    return text[start:end + 1]
+
+
+def _prepare_image(image_data: bytes):
+    """Görseli Gemini'ye göndermeden önce küçült (max 1024 px, JPEG q=85)"""
+    import io
+    import PIL.Image
+    
+    image = PIL.Image.open(io.BytesIO(image_data))
+    image.thumbnail((1024, 1024), PIL.Image.LANCZOS)
+    buf = io.BytesIO()
+    image.convert('RGB').save(buf, 'JPEG', quality=85, optimize=True)
+    buf.seek(0)
+    return PIL.Image.open(buf)
+
+
+# Telegram Client
+client = TelegramClient(
+    'signal_session',
+    int(config.TELEGRAM_API_ID),
+    config.TELEGRAM_API_HASH
+)
+
+
+class TelegramSignalReader:
+    """Telegram kanallarından sinyal okuyucu"""
+    
+    DEDUP_TTL = 7 * 24 * 3600  # Kalıcı tekrar kaydı saklama süresi (saniye)
+    
+    def __init__(self):
+        self.trader = BybitTrader()
+        self.channels = config.TELEGRAM_CHANNELS
+        self._seen_ids: OrderedDict = OrderedDict()  # Tekrar işlememek için (son 1000 mesaj)
+        
+        # Kalıcı tekrar kontrolü - yeniden başlatmada Telethon'un tekrar ettiği mesajlar atlanır
+        self._dedup = sqlite3.connect(config.TELEGRAM_DEDUP_DB, isolation_level=None, check_same_thread=False)
+        self._dedup.execute("PRAGMA journal_mode=WAL")
+        self._dedup.execute(
+            "CREATE TABLE IF NOT EXISTS seen (cid INTEGER, mid INTEGER, ts INTEGER, PRIMARY KEY (cid, mid))"
+        )
+        self._dedup.execute("DELETE FROM seen WHERE ts < ?", (int(time.time()) - self.DEDUP_TTL,))
+        # Disk yazmaları event loop dışında, tek worker (SQLite bağlantısı sıralı kullanılır)
+        self._exec = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dedup')
+        
+        # Gemini sonuç önbelleği (içerik hash'i -> analiz), forward/repost için
+        self._sig_cache: OrderedDict = OrderedDict()
+        self._sig_cache_max = 512
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+    async def analyze_with_gemini(self, text: str, image_data: bytes = None) -> dict:
+        """Mesajı Gemini ile analiz et (aynı içerik önbellekten döner)"""
+        key = hashlib.sha256((text or '').encode() + (image_data or b'')).hexdigest()
+        cached = self._sig_cache.get(key)
+        if cached is not None:
+            self._sig_cache.move_to_end(key)
+            self.cache_hits += 1
+            logger.debug(f"Gemini önbellek isabeti ({self.cache_hits}/{self.cache_hits + self.cache_misses})")
+            return cached
+        self.cache_misses += 1
+        
+        # Sabit prefix + değişken mesaj ayrı parçalar olarak gönderilir
+        prompt = [_PROMPT_PREFIX, f"MESAJ:\n{text}"]
         
         try:
+            model = _get_model()
             if image_data:
-                # Görsel ile analiz
-                import PIL.Image
-                import io
-                image = PIL.Image.open(io.BytesIO(image_data))
-                response = model.generate_content([prompt, image])
+                # Görsel ile analiz (küçültülmüş kopya; hash orijinal bayttan)
+                image = await asyncio.to_thread(_prepare_image, image_data)
+                response = await asyncio.to_thread(model.generate_content, prompt + [image])
             else:
                 # Sadece metin
-                response = model.generate_content(prompt)
-            
-            text_response = response.text.strip()
+                response = await asyncio.to_thread(model.generate_content, prompt)
             
-            # JSON parse
-            if "```json" in text_response:
-                text_response = text_response.split("```json")[1].split("```")[0]
-            elif "```" in text_response:
-                text_response = text_response.split("```")[1].split("```")[0]
+            # JSON parse - orjson varsa onunla
+            payload = _extract_json(response.text)
+            try:
+                result = json_loads(payload)
+            except ValueError:
+                result = json.loads(payload)
             
-            return json.loads(text_response)
+            self._sig_cache[key] = result
+            if len(self._sig_cache) > self._sig_cache_max:
+                self._sig_cache.popitem(last=False)
+            return result
             
         except Exception as e:
             logger.error(f"Gemini analiz hatası: {e}")
             return {"is_signal": False, "reason": str(e)}
     
-    def format_symbol(self, symbol: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def format_symbol(symbol: str) -> str:
         """Sembolü Bybit formatına çevir"""
         symbol = symbol.upper().strip()
         
@@ -115,7 +204,8 @@ Eğer sinyal değilse:
         if symbol.endswith("USD") and not symbol.endswith("USDT"):
             symbol = symbol + "T"
         
-        return symbol
+        # Aynı sembol tek nesne: aşağı akıştaki dict/set aramaları kimlikle kısa devre yapar
+        return sys.intern(symbol)
     
     async def execute_signal(self, signal: dict):
         """Sinyali işleme al"""
@@ -137,7 +227,7 @@ Eğer sinyal değilse:
                 return
             
             # Mevcut pozisyon kontrolü
-            positions = self.trader.get_all_positions()
+            positions = await asyncio.to_thread(self.trader.get_all_positions)
             open_symbols = [p['symbol'] for p in positions]
             
             if symbol in open_symbols:
@@ -145,7 +235,7 @@ Eğer sinyal değilse:
                 return
             
             # Bakiye kontrolü
-            balance = self.trader.get_available_balance()
+            balance = await asyncio.to_thread(self.trader.get_available_balance)
             if balance < 5:
                 logger.warning(f"Yetersiz bakiye: {balance} USDT")
                 return
@@ -167,7 +257,8 @@ Eğer sinyal değilse:
 """)
             
             # İşlem aç
-            result = self.trader.open_trade(
+            result = await asyncio.to_thread(
+                self.trader.open_trade,
                 symbol=symbol,
                 side=side,
                 stop_loss=sl,
@@ -182,19 +273,30 @@ Eğer sinyal değilse:
         except Exception as e:
             logger.error(f"Sinyal işleme hatası: {e}")
     
+    def _insert_seen(self, key: tuple) -> bool:
+        """Mesajı kalıcı kayda ekle; daha önce görülmüşse False"""
+        cur = self._dedup.execute(
+            "INSERT OR IGNORE INTO seen (cid, mid, ts) VALUES (?, ?, ?)",
+            (*key, int(time.time()))
+        )
+        return cur.rowcount > 0
+    
     async def handle_message(self, event):
         """Yeni mesajı işle"""
         try:
             message = event.message
             
-            # Tekrar kontrol
-            if message.id in self.processed_messages:
+            # Tekrar kontrol - son 1000 mesaj bellekte, tamamı SQLite'ta
+            key = (event.chat_id, message.id)
+            if key in self._seen_ids:
                 return
-            self.processed_messages.add(message.id)
+            self._seen_ids[key] = None
+            if len(self._seen_ids) > 1000:
+                self._seen_ids.popitem(last=False)
             
-            # Son 1000 mesajı tut
-            if len(self.processed_messages) > 1000:
-                self.processed_messages = set(list(self.processed_messages)[-500:])
+            loop = asyncio.get_running_loop()
+            if not await loop.run_in_executor(self._exec, self._insert_seen, key):
+                return
             
             text = message.text or message.message or ""
             image_data = None
@@ -207,8 +309,8 @@ Eğer sinyal değilse:
                     except:
                         pass
             
-            # Çok kısa mesajları atla
-            if len(text) < 10 and not image_data:
+            # Çok kısa mesajları ve sinyal ipucu olmayan sohbeti atla
+            if not image_data and (len(text) < 10 or not _has_signal_hint(text)):
                 return
             
             logger.info(f"📩 Yeni mesaj: {text[:100]}...")
@@ -241,20 +343,24 @@ Eğer sinyal değilse:
         )
         logger.info("✅ Telegram'a bağlandı")
         
-        # Kanalları bul ve dinle
-        for channel_name in self.channels:
-            try:
-                # Kanal entity'sini al
-                entity = await client.get_entity(channel_name)
+        # Kanalları paralel çöz (bulunamayanlar atlanır)
+        results = await asyncio.gather(
+            *(client.get_entity(channel_name) for channel_name in self.channels),
+            return_exceptions=True
+        )
+        entities = []
+        for channel_name, entity in zip(self.channels, results):
+            if isinstance(entity, Exception):
+                logger.error(f"❌ Kanal bulunamadı: {channel_name} - {entity}")
+            else:
+                entities.append(entity)
                 logger.info(f"✅ Kanal bulundu: {channel_name}")
-                
-                # Event handler ekle
-                @client.on(events.NewMessage(chats=entity))
-                async def handler(event):
-                    await self.handle_message(event)
-                    
-            except Exception as e:
-                logger.error(f"❌ Kanal bulunamadı: {channel_name} - {e}")
+        
+        # Tüm kanallar için tek event handler
+        if entities:
+            @client.on(events.NewMessage(chats=entities))
+            async def handler(event):
+                await self.handle_message(event)
         
         logger.info("🎧 Mesajlar dinleniyor...")
         await client.run_until_disconnected()
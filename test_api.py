@@ -10,12 +10,15 @@ BASE_URL = "https://uuapi.rerrkvifj.com"
 EX_TOKEN = "312a9390ca9b4abf9b123e7deab0603a"
 EX_DEVICE_ID = "GAr7hwZYk7krdfVNMFLiFGjUcqoCWCmU"
 
+# Tüm test istekleri aynı keep-alive bağlantıyı kullanır (her istekte yeni TLS el sıkışması yok)
+_SESSION = requests.Session()
+
+_SHA = hashlib.sha256
+
 def generate_signature(timestamp):
     """Generate ex-signature"""
-    # Bu muhtemelen timestamp + secret hash
-    data = str(timestamp)
-    signature = hashlib.sha256(data.encode()).hexdigest()
-    return base64.b64encode(signature.encode()).decode()
+    # Bu muhtemelen timestamp + secret hash (hex digest base64'lenir - imza formatı değişmez)
+    return base64.b64encode(_SHA(str(timestamp).encode('ascii')).hexdigest().encode('ascii')).decode('ascii')
 
 def make_futures_request(endpoint, params=None):
     """Make request to LBank Futures API"""
@@ -51,7 +54,7 @@ def make_futures_request(endpoint, params=None):
     url = f"{BASE_URL}{endpoint}"
     
     try:
-        r = requests.get(url, params=params, headers=headers, timeout=10)
+        r = _SESSION.get(url, params=params, headers=headers, timeout=10)
         return r.status_code, r.json() if r.headers.get('content-type', '').startswith('application/json') else r.text
     except Exception as e:
         return 0, str(e)
@@ -1,3 +1,4 @@
+import sys
 from bybit_api import BybitAPI, BybitTrader
 import config
 
@@ -17,8 +18,7 @@ print(f"   💰 Kullanılabilir USDT: {balance}")
 print(f"\n📌 2. Parite Fiyatları ({len(trader.trading_pairs)} parite):")
 print("-" * 50)
 prices = trader.get_all_prices()
-for symbol, price in prices.items():
-    print(f"   {symbol:12} : ${price:,.2f}")
+sys.stdout.write("".join(f"   {symbol:12} : ${price:,.2f}\n" for symbol, price in prices.items()))
 
 # 3. Açık pozisyonlar
 print(f"\n📌 3. Açık Pozisyonlar:")
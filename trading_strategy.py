@@ -2,18 +2,95 @@
 Trading Stratejisi ve Risk Yönetimi Modülü
 Kasayı korurken agresif işlem stratejisi
 """
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 from dataclasses import dataclass
+from enum import IntEnum
+from cachetools import TTLCache
+import numpy as np
 from loguru import logger
 import config
 from lbank_api import LBankAPI, LBankTrader
-from gemini_analyzer import GeminiAnalyzer, MarketAnalysis
-from telegram_signals import TradingSignal
-from database import Database
+from database import Database, DeferredWrites
+from utils import njit, prange
 
+if TYPE_CHECKING:
+    from telegram_signals import TradingSignal  # telethon sadece tip kontrolünde yüklenir
+    from gemini_analyzer import GeminiAnalyzer, MarketAnalysis  # google.generativeai ilk kullanımda
 
-@dataclass
+
+# Varsayılan TP çarpanları (girişten %2, %4, %6, %8, %10)
+_LONG_TP_MULT = np.array([1.02, 1.04, 1.06, 1.08, 1.10])
+_SHORT_TP_MULT = np.array([0.98, 0.96, 0.94, 0.92, 0.90])
+
+# _eval_trades aksiyon bayrakları (aynı işlem için birden fazlası birlikte set olabilir)
+_ACT_TP = 1        # TP seviyesine ulaşıldı
+_ACT_SL = 2        # SL tetiklendi
+_ACT_MOVE_SL = 4   # Kârda (>= %2) - SL entry'e çekilmeli
+
+
+@njit(cache=True)
+def _eval_trades(entry, current, side, tp, sl):
+    """
+    Açık işlemlerin PNL yüzdesi ve aksiyon bayrakları
+    side: LONG=1, SHORT=-1, diğer=0 | tp/sl: 0 ise kontrol edilmez
+    
+    Returns:
+        (pnl_pct, flags)
+    """
+    n = entry.shape[0]
+    pnl = np.empty(n, dtype=np.float64)
+    flags = np.zeros(n, dtype=np.uint8)
+    for i in range(n):
+        if side[i] == 1:
+            pnl[i] = (current[i] - entry[i]) / entry[i] * 100
+        else:
+            pnl[i] = (entry[i] - current[i]) / entry[i] * 100
+        
+        if tp[i] > 0 and ((side[i] == 1 and current[i] >= tp[i]) or
+                          (side[i] == -1 and current[i] <= tp[i])):
+            flags[i] |= _ACT_TP
+        if pnl[i] >= 2:
+            flags[i] |= _ACT_MOVE_SL
+        if sl[i] > 0 and ((side[i] == 1 and current[i] <= sl[i]) or
+                          (side[i] == -1 and current[i] >= sl[i])):
+            flags[i] |= _ACT_SL
+    return pnl, flags
+
+
+@njit(parallel=True, cache=True)
+def _rr_batch(entry, sl, tp, is_long, min_rr):
+    """validate_risk_reward'ın toplu hali - (geçerli_mi, risk_reward_oranı) dizileri"""
+    n = entry.shape[0]
+    out_valid = np.empty(n, dtype=np.bool_)
+    out_rr = np.empty(n, dtype=np.float64)
+    for i in prange(n):
+        if is_long[i]:
+            risk = entry[i] - sl[i]
+            reward = tp[i] - entry[i]
+        else:
+            risk = sl[i] - entry[i]
+            reward = entry[i] - tp[i]
+        
+        if risk <= 0:
+            out_valid[i] = False
+            out_rr[i] = 0.0
+        else:
+            out_rr[i] = reward / risk
+            out_valid[i] = out_rr[i] >= min_rr
+    return out_valid, out_rr
+
+
+class Side(IntEnum):
+    """İşlem yönü (_eval_trades ile aynı kodlama)"""
+    LONG = 1
+    SHORT = -1
+
+
+@dataclass(slots=True, frozen=True)
 class TradeDecision:
     """İşlem kararı"""
     should_trade: bool
@@ -27,17 +104,50 @@ class TradeDecision:
     reason: str
     confidence: float
     risk_level: str
+    side: Optional[Side] = None    # Sadece işlem açılacaksa dolu
 
 
 class RiskManager:
     """Risk Yöneticisi"""
     
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, lbank: LBankTrader = None):
         self.db = db
+        self.lbank = lbank                # Bakiye kaynağı (get_balance)
         self.max_open_trades = 5          # Aynı anda max açık işlem
         self.max_daily_loss_percent = 10  # Günlük max kayıp %10
         self.max_single_trade_risk = 2    # Tek işlem max %2
         self.min_risk_reward = 1.5        # Min risk/ödül oranı
+        
+        # Kısa ömürlü sorgu önbelleği: {anahtar: (değer, son_geçerlilik)} - sinyal patlamalarında tek sorgu
+        self._ttl_cache: Dict[str, Tuple[object, float]] = {}
+        self.cache_ttl = 2.0
+    
+    def _cached(self, key: str, ttl: float, loader):
+        """Anahtar için önbellekteki değeri döndür, süresi geçtiyse loader() ile yenile"""
+        now = time.monotonic()
+        hit = self._ttl_cache.get(key)
+        if hit is not None and hit[1] > now:
+            return hit[0]
+        value = loader()
+        self._ttl_cache[key] = (value, now + ttl)
+        return value
+    
+    def _invalidate(self, *keys: str):
+        """İşlem açılıp/kapanınca ilgili önbellek girdilerini sil"""
+        for key in keys:
+            self._ttl_cache.pop(key, None)
+    
+    def get_open_trades(self) -> List[Dict]:
+        """Açık işlemler (kısa süre önbellekli)"""
+        return self._cached('open_trades', self.cache_ttl, self.db.get_open_trades)
+    
+    def get_open_trades_array(self) -> Tuple[np.ndarray, List[Dict]]:
+        """Açık işlemler yapısal dizi + trade dict'leri (kısa süre önbellekli)"""
+        return self._cached('open_trades_array', self.cache_ttl, self.db.get_open_trades_array)
+    
+    def get_balance(self) -> float:
+        """Kullanılabilir bakiye (kısa süre önbellekli - sinyal patlamalarında tek API çağrısı)"""
+        return self._cached('balance', self.cache_ttl, self.lbank.get_available_balance)
     
     def can_open_trade(self, balance: float) -> Tuple[bool, str]:
         """
@@ -47,19 +157,23 @@ class RiskManager:
             (açılabilir_mi, sebep)
         """
         # Açık işlem sayısı kontrolü
-        open_trades = self.db.get_open_trades()
+        open_trades = self.get_open_trades()
         if len(open_trades) >= self.max_open_trades:
             return False, f"Max açık işlem sayısına ulaşıldı ({self.max_open_trades})"
         
         # Günlük kayıp kontrolü
-        daily_perf = self.db.get_daily_performance()
+        daily_perf = self._cached('daily_performance', self.cache_ttl, self.db.get_daily_performance)
         if daily_perf:
-            pnl_pct = float(daily_perf.get('pnl_percentage', 0))
+            pnl_pct = daily_perf.get('pnl_percentage', 0)
             if pnl_pct <= -self.max_daily_loss_percent:
                 return False, f"Günlük max kayıp limitine ulaşıldı ({pnl_pct:.2f}%)"
         
         return True, "OK"
     
+    def open_slots(self) -> int:
+        """Max açık işlem limitine kadar açılabilecek işlem sayısı"""
+        return max(0, self.max_open_trades - len(self.get_open_trades()))
+    
     def calculate_position_size(self, balance: float, stop_loss_percent: float = 3) -> float:
         """
         Pozisyon büyüklüğü hesapla
@@ -97,6 +211,23 @@ class RiskManager:
         
         return rr_ratio >= self.min_risk_reward, rr_ratio
     
+    def validate_risk_reward_batch(self, entries: np.ndarray, stop_losses: np.ndarray,
+                                   take_profits: np.ndarray, sides_long: np.ndarray
+                                   ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Çok sayıda sinyal için Risk/Ödül doğrulaması (backtest vb.)
+        
+        Returns:
+            (geçerli_mi maskesi, risk_reward_oranları)
+        """
+        return _rr_batch(
+            np.asarray(entries, dtype=np.float64),
+            np.asarray(stop_losses, dtype=np.float64),
+            np.asarray(take_profits, dtype=np.float64),
+            np.asarray(sides_long, dtype=np.bool_),
+            float(self.min_risk_reward)
+        )
+    
     def adjust_stop_loss_to_entry(self, entry_price: float, side: str, 
                                    current_pnl_percent: float) -> Optional[float]:
         """
@@ -113,84 +244,158 @@ class RiskManager:
 class TradingStrategy:
     """Ana Trading Stratejisi"""
     
-    def __init__(self):
+    def __init__(self, lbank: LBankTrader = None):
         self.db = Database()
-        self.lbank = LBankTrader()
-        self.gemini = GeminiAnalyzer()
-        self.risk_manager = RiskManager(self.db)
+        self.lbank = lbank or LBankTrader()
+        # Tüm REST çağrıları LBankAPI'nin tek keep-alive istemcisinden geçmeli (istek başına TLS el sıkışması yok)
+        if not isinstance(self.lbank.api, LBankAPI):
+            raise TypeError(f"LBankTrader.api bir LBankAPI olmalı, {type(self.lbank.api).__name__} verildi")
+        self._gemini = None  # İlk Gemini doğrulamasında yüklenir
+        self.risk_manager = RiskManager(self.db, self.lbank)
         self.leverage = config.LEVERAGE
+        
+        # Gemini sinyal doğrulamaları: (coin, yön, yuvarlanmış giriş) -> sonuç
+        self._validation_cache = TTLCache(maxsize=256, ttl=60)
+    
+    @property
+    def gemini(self) -> 'GeminiAnalyzer':
+        """Gemini analizörü - google.generativeai ilk kullanımda yüklenir"""
+        if self._gemini is None:
+            from gemini_analyzer import GeminiAnalyzer
+            self._gemini = GeminiAnalyzer()
+        return self._gemini
     
-    def process_telegram_signal(self, signal: TradingSignal) -> TradeDecision:
+    def _skip(self, symbol: str, reason: str, confidence: float = 0.0,
+              risk_level: str = 'HIGH') -> TradeDecision:
+        """İşlem yapılmayacak (SKIP) kararı"""
+        return TradeDecision(False, 'SKIP', symbol, 0, self.leverage, None, [], None,
+                             reason, confidence, risk_level)
+    
+    def process_telegram_signal(self, signal: 'TradingSignal') -> TradeDecision:
         """
         Telegram sinyalini işle ve karar ver
         """
-        logger.info(f"Sinyal işleniyor: {signal.coin} {signal.side}")
-        
-        # Sinyali kaydet
-        signal_id = self.db.save_signal({
-            'coin': signal.coin,
-            'side': signal.side,
-            'entries': signal.entries,
-            'take_profits': signal.take_profits,
-            'stop_loss': signal.stop_loss,
-            'leverage': signal.leverage,
-            'source': signal.source,
-            'confidence': signal.confidence,
-            'raw_message': signal.raw_message
-        })
+        return self.process_telegram_signals_batch([signal])[0]
+    
+    def process_telegram_signals_batch(self, signals: List['TradingSignal']) -> List[TradeDecision]:
+        """
+        Birden fazla Telegram sinyalini birlikte işle
+        Tek toplu INSERT, tek bakiye sorgusu, paralel kline çekimi ve tek Gemini isteği
+        """
+        if not signals:
+            return []
+        
+        for signal in signals:
+            logger.info(f"Sinyal işleniyor: {signal.coin} {signal.side}")
+        
+        # Sinyalleri kaydet
+        signal_ids = self.db.save_signals_bulk([
+            {
+                'coin': signal.coin,
+                'side': signal.side,
+                'entries': signal.entries,
+                'take_profits': signal.take_profits,
+                'stop_loss': signal.stop_loss,
+                'leverage': signal.leverage,
+                'source': signal.source,
+                'confidence': signal.confidence,
+                'raw_message': signal.raw_message
+            }
+            for signal in signals
+        ])
         
         # Bakiye al
-        balance = self.lbank.get_available_balance()
+        balance = self.risk_manager.get_balance()
         
-        # Risk kontrolü
+        # Risk kontrolü (günlük kayıp ve en az bir boş işlem kotası)
         can_trade, reason = self.risk_manager.can_open_trade(balance)
         if not can_trade:
-            self.db.update_signal_status(signal_id, 'REJECTED', reason)
-            return TradeDecision(
-                should_trade=False,
-                action='SKIP',
-                symbol=signal.coin,
-                volume=0,
-                leverage=self.leverage,
-                entry_price=None,
-                take_profits=[],
-                stop_loss=None,
-                reason=reason,
-                confidence=0,
-                risk_level='HIGH'
-            )
-        
-        # Coin fiyat verisi al ve Gemini'ye doğrulat
-        symbol = f"{signal.coin}_USDT"
-        price_data = self.lbank.api.futures_get_kline(symbol, '1h', 100)
-        
-        prices = []
-        if price_data['success'] and price_data.get('data'):
-            for candle in price_data['data']:
-                if isinstance(candle, list) and len(candle) >= 5:
-                    prices.append(float(candle[4]))  # Close price
+            decisions = []
+            for signal, signal_id in zip(signals, signal_ids):
+                self.db.update_signal_status(signal_id, 'REJECTED', reason)
+                decisions.append(self._skip(signal.coin, reason))
+            return decisions
+        
+        # Gemini'ye sadece sonucu değiştirebileceği sinyaller gider (çok yüksek/düşük güven
+        # ve son 60 sn'de aynı coin/yön/giriş için doğrulananlar atlanır)
+        validations = {}
+        to_fetch = []
+        for i, signal in enumerate(signals):
+            if not signal.entries:
+                continue
+            if signal.confidence >= config.GEMINI_SKIP_HIGH or signal.confidence <= config.GEMINI_SKIP_LOW:
+                continue
+            cached = self._validation_cache.get(self._validation_key(signal))
+            if cached is not None:
+                validations[i] = cached
+            else:
+                to_fetch.append(i)
         
-        # Gemini doğrulaması
-        if prices and signal.entries:
-            valid, reasoning, gemini_confidence = self.gemini.validate_signal(
-                signal.coin, signal.side, signal.entries[0], prices
-            )
+        if to_fetch:
+            # Coin fiyat verilerini paralel al (en fazla 10 eşzamanlı istek)
+            with ThreadPoolExecutor(max_workers=min(10, len(to_fetch))) as pool:
+                price_lists = list(pool.map(self._get_close_prices, [signals[i].coin for i in to_fetch]))
+            
+            # Gemini doğrulaması - fiyatı olan sinyaller tek istekte
+            to_validate = [(i, prices) for i, prices in zip(to_fetch, price_lists) if len(prices)]
+            results = self.gemini.validate_signals_batch([
+                (signals[i].coin, signals[i].side, signals[i].entries[0], prices)
+                for i, prices in to_validate
+            ])
+            for (i, _), result in zip(to_validate, results):
+                validations[i] = result
+                self._validation_cache[self._validation_key(signals[i])] = result
+        
+        # Onaylar kalan işlem kotasına göre sayılır - tek batch max açık işlem limitini aşamaz
+        slots = self.risk_manager.open_slots()
+        decisions = []
+        for i, (signal, signal_id) in enumerate(zip(signals, signal_ids)):
+            if slots <= 0:
+                reason = f"Max açık işlem sayısına ulaşıldı ({self.risk_manager.max_open_trades})"
+                self.db.update_signal_status(signal_id, 'REJECTED', reason)
+                decisions.append(self._skip(signal.coin, reason))
+                continue
+            decision = self._decide_signal(signal, signal_id, balance, validations.get(i))
+            if decision.should_trade:
+                slots -= 1
+            decisions.append(decision)
+        return decisions
+    
+    @staticmethod
+    def _validation_key(signal: 'TradingSignal') -> tuple:
+        """Doğrulama önbellek anahtarı: coin, yön ve ~%1 hassasiyette giriş (3 anlamlı basamak)"""
+        entry = float(signal.entries[0])
+        if entry <= 0:
+            return (signal.coin, signal.side, entry)
+        return (signal.coin, signal.side, round(entry, 2 - math.floor(math.log10(entry))))
+    
+    def _get_close_prices(self, coin: str) -> np.ndarray:
+        """Son 100 saatlik mumun kapanış fiyatları"""
+        price_data = self.lbank.api.futures_get_kline(f"{coin}_USDT", '1h', 100)
+        
+        if not (price_data['success'] and price_data.get('data')):
+            return np.empty(0, dtype=np.float64)
+        # Close price (4. sütun) tek C döngüsüyle float64 diziye
+        return np.fromiter(
+            (candle[4] for candle in price_data['data']
+             if isinstance(candle, list) and len(candle) >= 5),
+            dtype=np.float64
+        )
+    
+    def _decide_signal(self, signal: 'TradingSignal', signal_id: int, balance: float,
+                       validation: Optional[Tuple[bool, str, float]]) -> TradeDecision:
+        """Gemini doğrulaması yapılmış tek sinyal için karar ver"""
+        # Çok düşük güvenli sinyaller Gemini'ye sorulmadan reddedilir
+        if signal.confidence <= config.GEMINI_SKIP_LOW:
+            self.db.update_signal_status(signal_id, 'REJECTED', f"Düşük sinyal güveni: {signal.confidence:.2f}")
+            return self._skip(signal.coin, f"Sinyal güveni düşük: {signal.confidence:.0%}", signal.confidence)
+        
+        if validation is not None:
+            valid, reasoning, gemini_confidence = validation
             
             if not valid or gemini_confidence < 0.5:
                 self.db.update_signal_status(signal_id, 'REJECTED', f"Gemini red: {reasoning}")
-                return TradeDecision(
-                    should_trade=False,
-                    action='SKIP',
-                    symbol=signal.coin,
-                    volume=0,
-                    leverage=self.leverage,
-                    entry_price=None,
-                    take_profits=[],
-                    stop_loss=None,
-                    reason=f"Gemini doğrulamadı: {reasoning}",
-                    confidence=gemini_confidence,
-                    risk_level='HIGH'
-                )
+                return self._skip(signal.coin, f"Gemini doğrulamadı: {reasoning}", gemini_confidence)
         
         # Risk/Ödül kontrolü
         if signal.entries and signal.take_profits and signal.stop_loss:
@@ -203,19 +408,7 @@ class TradingStrategy:
             if not valid_rr:
                 self.db.update_signal_status(signal_id, 'REJECTED', 
                                             f"Düşük R/R: {rr_ratio:.2f}")
-                return TradeDecision(
-                    should_trade=False,
-                    action='SKIP',
-                    symbol=signal.coin,
-                    volume=0,
-                    leverage=self.leverage,
-                    entry_price=None,
-                    take_profits=[],
-                    stop_loss=None,
-                    reason=f"Risk/Ödül oranı düşük: {rr_ratio:.2f}",
-                    confidence=signal.confidence,
-                    risk_level='HIGH'
-                )
+                return self._skip(signal.coin, f"Risk/Ödül oranı düşük: {rr_ratio:.2f}", signal.confidence)
         
         # Pozisyon büyüklüğü hesapla
         stop_loss_pct = 3  # Varsayılan %3
@@ -240,86 +433,59 @@ class TradingStrategy:
             stop_loss=signal.stop_loss,
             reason=f"Sinyal onaylandı: Güven={signal.confidence:.0%}",
             confidence=signal.confidence,
-            risk_level='MEDIUM' if signal.confidence > 0.7 else 'HIGH'
+            risk_level='MEDIUM' if signal.confidence > 0.7 else 'HIGH',
+            side=Side.LONG if signal.side == 'LONG' else Side.SHORT
         )
     
-    def process_gemini_analysis(self, analysis: MarketAnalysis) -> TradeDecision:
+    def process_gemini_analysis(self, analysis: 'MarketAnalysis') -> TradeDecision:
         """
         Gemini analizini işle (scalper ve saatlik analiz)
         """
         logger.info(f"Gemini analizi işleniyor: {analysis.coin} {analysis.recommendation}")
         
-        # Analizi kaydet
-        analysis_id = self.db.save_gemini_analysis({
-            'coin': analysis.coin,
-            'recommendation': analysis.recommendation,
-            'confidence': analysis.confidence,
-            'entry_price': analysis.entry_price,
-            'take_profits': analysis.take_profits,
-            'stop_loss': analysis.stop_loss,
-            'leverage': analysis.leverage,
-            'risk_level': analysis.risk_level,
-            'reasoning': analysis.reasoning,
-            'technical_summary': analysis.technical_summary,
-            'analysis_type': analysis.technical_summary.get('mode', 'STANDARD')
-        })
+        decision = self._decide_gemini_analysis(analysis)
+        
+        # Analizi kaydet - HOLD/düşük güven/risk reddi satırları varsayılan olarak yazılmaz
+        if decision.should_trade or config.SAVE_ALL_ANALYSES:
+            self.db.save_gemini_analysis({
+                'coin': analysis.coin,
+                'recommendation': analysis.recommendation,
+                'confidence': analysis.confidence,
+                'entry_price': analysis.entry_price,
+                'take_profits': analysis.take_profits,
+                'stop_loss': analysis.stop_loss,
+                'leverage': analysis.leverage,
+                'risk_level': analysis.risk_level,
+                'reasoning': analysis.reasoning,
+                'technical_summary': analysis.technical_summary,
+                'analysis_type': analysis.technical_summary.get('mode', 'STANDARD')
+            })
         
+        return decision
+    
+    def _decide_gemini_analysis(self, analysis: 'MarketAnalysis') -> TradeDecision:
+        """Gemini analizinden işlem kararı üret"""
         # HOLD önerisiyse işlem yapma
         if analysis.recommendation == 'HOLD':
-            return TradeDecision(
-                should_trade=False,
-                action='SKIP',
-                symbol=analysis.coin,
-                volume=0,
-                leverage=self.leverage,
-                entry_price=None,
-                take_profits=[],
-                stop_loss=None,
-                reason="Gemini HOLD önerdi",
-                confidence=analysis.confidence,
-                risk_level=analysis.risk_level
-            )
+            return self._skip(analysis.coin, "Gemini HOLD önerdi", analysis.confidence,
+                              risk_level=analysis.risk_level)
         
         # Düşük güven kontrolü
         if analysis.confidence < 0.6:
-            return TradeDecision(
-                should_trade=False,
-                action='SKIP',
-                symbol=analysis.coin,
-                volume=0,
-                leverage=self.leverage,
-                entry_price=None,
-                take_profits=[],
-                stop_loss=None,
-                reason=f"Düşük güven skoru: {analysis.confidence:.0%}",
-                confidence=analysis.confidence,
-                risk_level='HIGH'
-            )
+            return self._skip(analysis.coin, f"Düşük güven skoru: {analysis.confidence:.0%}", analysis.confidence)
         
         # Risk kontrolü
-        balance = self.lbank.get_available_balance()
+        balance = self.risk_manager.get_balance()
         can_trade, reason = self.risk_manager.can_open_trade(balance)
         
         if not can_trade:
-            return TradeDecision(
-                should_trade=False,
-                action='SKIP',
-                symbol=analysis.coin,
-                volume=0,
-                leverage=self.leverage,
-                entry_price=None,
-                take_profits=[],
-                stop_loss=None,
-                reason=reason,
-                confidence=analysis.confidence,
-                risk_level='HIGH'
-            )
+            return self._skip(analysis.coin, reason, analysis.confidence)
         
         # Pozisyon büyüklüğü
         volume = self.risk_manager.calculate_position_size(balance)
         
-        side = "LONG" if analysis.recommendation == "BUY" else "SHORT"
-        action = f"OPEN_{side}"
+        side = Side.LONG if analysis.recommendation == "BUY" else Side.SHORT
+        action = f"OPEN_{side.name}"
         
         return TradeDecision(
             should_trade=True,
@@ -332,7 +498,8 @@ class TradingStrategy:
             stop_loss=analysis.stop_loss,
             reason=f"Gemini {analysis.recommendation}: {analysis.reasoning[:100]}...",
             confidence=analysis.confidence,
-            risk_level=analysis.risk_level
+            risk_level=analysis.risk_level,
+            side=side
         )
     
     def execute_trade(self, decision: TradeDecision) -> Dict:
@@ -349,8 +516,14 @@ class TradingStrategy:
         
         logger.info(f"İşlem açılıyor: {symbol} {decision.action}")
         
-        # Side belirle
-        side = "LONG" if "LONG" in decision.action else "SHORT"
+        # Side belirle - side verilmemişse action'dan türet (OPEN_LONG / OPEN_SHORT)
+        side = decision.side
+        if side is None:
+            side = Side.__members__.get(decision.action.rpartition('_')[2])
+        if side is None:
+            logger.error(f"İşlem yönü belirlenemedi: {decision.symbol} {decision.action}")
+            return {'success': False, 'reason': f"Geçersiz işlem yönü: {decision.action}"}
+        side = side.name
         
         # Birden fazla giriş için entries listesi oluştur
         entries = [decision.entry_price] if decision.entry_price else None
@@ -380,6 +553,7 @@ class TradingStrategy:
                         'status': 'OPEN'
                     })
                     logger.info(f"İşlem DB'ye kaydedildi: ID={trade_id}")
+            self.risk_manager._invalidate('open_trades', 'open_trades_array', 'balance')
         
         return result
     
@@ -387,74 +561,94 @@ class TradingStrategy:
         """
         Açık işlemleri yönet (TP takibi, SL güncelleme)
         """
-        open_trades = self.db.get_open_trades()
-        
-        for trade in open_trades:
-            symbol = f"{trade['coin']}_USDT"
-            
-            # Güncel fiyat al
-            price_result = self.lbank.api.futures_get_market_price(symbol)
-            if not price_result['success']:
-                continue
-            
-            current_price = float(price_result.get('data', {}).get('price', 0))
-            if current_price == 0:
-                continue
-            
-            entry_price = float(trade['entry_price'])
-            side = trade['side']
-            
-            # PNL hesapla
-            if side == 'LONG':
-                pnl_pct = (current_price - entry_price) / entry_price * 100
-            else:
-                pnl_pct = (entry_price - current_price) / entry_price * 100
-            
-            # Trade güncelle
-            self.db.update_trade(trade['id'], {
-                'current_price': current_price,
-                'pnl_percentage': pnl_pct
-            })
-            
-            # TP kontrolü - kademeli TP alma
-            take_profit = float(trade.get('take_profit', 0))
-            if take_profit > 0:
-                if side == 'LONG' and current_price >= take_profit:
-                    self._process_tp(trade, current_price, pnl_pct)
-                elif side == 'SHORT' and current_price <= take_profit:
-                    self._process_tp(trade, current_price, pnl_pct)
-            
-            # Stop loss'u entry'e çek (kârda ise)
-            if pnl_pct >= 2:
-                new_sl = self.risk_manager.adjust_stop_loss_to_entry(
-                    entry_price, side, pnl_pct
-                )
-                if new_sl:
-                    self.lbank.move_stop_to_entry(symbol, new_sl)
-                    logger.info(f"SL entry'e çekildi: {trade['coin']} @ {new_sl}")
-            
-            # SL kontrolü
-            stop_loss = float(trade.get('stop_loss', 0))
-            if stop_loss > 0:
-                if side == 'LONG' and current_price <= stop_loss:
-                    self._close_trade_sl(trade, current_price, pnl_pct)
-                elif side == 'SHORT' and current_price >= stop_loss:
-                    self._close_trade_sl(trade, current_price, pnl_pct)
-    
-    def _process_tp(self, trade: Dict, current_price: float, pnl_pct: float):
-        """TP işle - %20 kapat"""
-        symbol = f"{trade['coin']}_USDT"
+        arr, open_trades = self.risk_manager.get_open_trades_array()
+        
+        if not open_trades:
+            return
+        
+        # Güncel fiyatlar paralel çekilir (fiyatı alınamayan işlemler atlanır)
+        price_map = self._fetch_prices_concurrent(list({t['symbol'] for t in open_trades}))
+        current = np.fromiter((price_map.get(t['symbol'], 0) for t in open_trades),
+                              np.float64, len(open_trades))
+        sel = np.flatnonzero(current)
+        if not len(sel):
+            return
+        
+        # PNL ve TP/SL kontrolleri tek JIT çağrısında
+        rows = arr[sel]
+        current = current[sel]
+        pnl, flags = _eval_trades(rows['entry'], current, rows['side'], rows['tp'], rows['sl'])
+        
+        # Bu turdaki tüm DB yazmaları biriktirilir, borsa çağrılarından sonra tek commit
+        acted = False
+        try:
+            with self.db.transaction() as tx:
+                # Fiyat/PNL güncellemeleri tek UPDATE ile (aksiyonlardan önce, eski sırayla aynı)
+                tx.update_trades_bulk(list(zip(rows['id'].tolist(), current.tolist(), pnl.tolist())))
+                
+                for i, current_price, entry_price, pnl_pct, flag in zip(
+                        sel.tolist(), current.tolist(), rows['entry'].tolist(), pnl.tolist(), flags.tolist()):
+                    trade = open_trades[i]
+                    symbol = trade['symbol']
+                    acted = acted or bool(flag & (_ACT_TP | _ACT_SL))
+                    
+                    # Bir işlemdeki hata diğer işlemlerin yazmalarını düşürmesin
+                    try:
+                        # TP kontrolü - kademeli TP alma
+                        if flag & _ACT_TP:
+                            self._process_tp(trade, current_price, pnl_pct, db=tx)
+                        
+                        # Stop loss'u entry'e çek (kârda ise)
+                        if flag & _ACT_MOVE_SL:
+                            new_sl = self.risk_manager.adjust_stop_loss_to_entry(
+                                entry_price, trade['side'], pnl_pct
+                            )
+                            if new_sl:
+                                self.lbank.move_stop_to_entry(symbol, new_sl)
+                                logger.info(f"SL entry'e çekildi: {trade['coin']} @ {new_sl}")
+                        
+                        # SL kontrolü
+                        if flag & _ACT_SL:
+                            self._close_trade_sl(trade, current_price, pnl_pct, db=tx)
+                    except Exception as e:
+                        logger.error(f"İşlem yönetim hatası ({trade['coin']}): {e}")
+        finally:
+            # Önbellek yazmalar commit edildikten sonra bir kez temizlenir
+            if acted:
+                self.risk_manager._invalidate('open_trades', 'open_trades_array',
+                                              'daily_performance', 'balance')
+    
+    def _fetch_prices_concurrent(self, symbols: List[str]) -> Dict[str, float]:
+        """Sembollerin güncel market fiyatlarını paralel al (başarısız olanlar dahil edilmez)"""
+        if not symbols:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=min(8, len(symbols))) as pool:
+            results = pool.map(self.lbank.api.futures_get_market_price, symbols)
+        
+        prices = {}
+        for symbol, price_result in zip(symbols, results):
+            if price_result['success']:
+                price = float(price_result.get('data', {}).get('price', 0))
+                if price:
+                    prices[symbol] = price
+        return prices
+    
+    def _process_tp(self, trade: Dict, current_price: float, pnl_pct: float,
+                    db: Optional[DeferredWrites] = None):
+        """TP işle - %20 kapat (db verilirse kayıt transaction sonunda yazılır)"""
+        symbol = trade['symbol']
         
         # %20 kapat
         result = self.lbank.close_partial(symbol, percentage=20)
         
         if result.get('success'):
             # TP kaydı
-            volume = float(trade.get('volume', 0))
+            volume = trade.get('volume', 0)
             closed_volume = volume * 0.2
             pnl = closed_volume * (pnl_pct / 100)
             
-            self.db.save_tp_record(
+            (db or self.db).save_tp_record(
                 trade_id=trade['id'],
                 tp_level=1,
                 price=current_price,
@@ -462,24 +656,30 @@ class TradingStrategy:
                 percentage=20,
                 pnl=pnl
             )
+            # Transaction içindeyse önbellek commit'ten sonra çağıran tarafından temizlenir
+            if db is None:
+                self.risk_manager._invalidate('open_trades', 'open_trades_array', 'balance')
             
             logger.info(f"TP alındı: {trade['coin']} %20, PNL={pnl:.2f} USDT")
     
-    def _close_trade_sl(self, trade: Dict, current_price: float, pnl_pct: float):
-        """SL ile işlem kapat"""
-        symbol = f"{trade['coin']}_USDT"
+    def _close_trade_sl(self, trade: Dict, current_price: float, pnl_pct: float,
+                        db: Optional[DeferredWrites] = None):
+        """SL ile işlem kapat (db verilirse kayıt transaction sonunda yazılır)"""
+        symbol = trade['symbol']
         
         result = self.lbank.api.futures_close_position(symbol)
         
-        volume = float(trade.get('volume', 0))
+        volume = trade.get('volume', 0)
         pnl = volume * (pnl_pct / 100)
         
-        self.db.close_trade(
+        (db or self.db).close_trade(
             trade_id=trade['id'],
             pnl=pnl,
             pnl_percentage=pnl_pct,
             reason='STOP_LOSS'
         )
+        if db is None:
+            self.risk_manager._invalidate('open_trades', 'open_trades_array', 'daily_performance', 'balance')
         
         logger.warning(f"SL tetiklendi: {trade['coin']}, PNL={pnl:.2f} USDT ({pnl_pct:.2f}%)")
 
@@ -490,7 +690,7 @@ class TPManager:
     def __init__(self, db: Database, lbank: LBankTrader):
         self.db = db
         self.lbank = lbank
-        self.tp_percentages = config.TP_PERCENTAGES  # [20, 20, 20, 20, 20]
+        self.tp_percentages = tuple(config.TP_PERCENTAGES)  # (20, 20, 20, 20, 20)
     
     def calculate_tp_levels(self, entry: float, side: str, 
                            target_profits: List[float] = None) -> List[Dict]:
@@ -511,30 +711,38 @@ class TPManager:
                 for i, tp in enumerate(target_profits[:5])
             ]
         
-        # Varsayılan TP seviyeleri (girişten %2, %4, %6, %8, %10)
-        multipliers = [1.02, 1.04, 1.06, 1.08, 1.10] if side == "LONG" else \
-                      [0.98, 0.96, 0.94, 0.92, 0.90]
+        # Varsayılan TP seviyeleri (girişten %2, %4, %6, %8, %10) - tek vektör çarpımı
+        prices = (entry * (_LONG_TP_MULT if side == "LONG" else _SHORT_TP_MULT)).tolist()
         
         return [
-            {
-                'level': i + 1,
-                'price': entry * mult,
-                'percentage': self.tp_percentages[i]
-            }
-            for i, mult in enumerate(multipliers)
+            {'level': i + 1, 'price': price, 'percentage': pct}
+            for i, (price, pct) in enumerate(zip(prices, self.tp_percentages))
         ]
     
+    @staticmethod
+    def calculate_tp_levels_batch(entries: np.ndarray, sides_long: np.ndarray) -> np.ndarray:
+        """
+        Çok sayıda işlem için varsayılan TP fiyatları (tek broadcast)
+        
+        Returns:
+            (N, 5) float64 dizi - satır i, işlem i'nin TP1..TP5 fiyatları
+        """
+        entries = np.asarray(entries, dtype=np.float64)[:, None]
+        return np.where(np.asarray(sides_long, dtype=np.bool_)[:, None],
+                        entries * _LONG_TP_MULT, entries * _SHORT_TP_MULT)
+    
     def check_and_execute_tp(self, trade: Dict, current_price: float) -> Optional[Dict]:
         """
         TP koşulunu kontrol et ve uygula
         """
-        entry = float(trade['entry_price'])
+        entry = trade['entry_price']
         side = trade['side']
-        symbol = f"{trade['coin']}_USDT"
+        symbol = trade['symbol']
         
-        # Alınan TP'leri kontrol et
-        executed_tps = self._get_executed_tps(trade['id'])
-        next_tp_level = len(executed_tps) + 1
+        # Alınan TP'ler (trades satırındaki toplamlar - tp_records taranmaz)
+        tp_count = int(trade.get('tp_count') or 0)
+        closed_pct = trade.get('cumulative_pct_closed') or 0
+        next_tp_level = tp_count + 1
         
         if next_tp_level > 5:
             return None  # Tüm TP'ler alınmış
@@ -557,8 +765,8 @@ class TPManager:
         result = self.lbank.close_partial(symbol, percentage=current_tp['percentage'])
         
         if result.get('success'):
-            volume = float(trade.get('volume', 0))
-            remaining_volume = volume * (1 - sum([tp['percentage'] for tp in executed_tps]) / 100)
+            volume = trade.get('volume', 0)
+            remaining_volume = volume * (1 - closed_pct / 100)
             closed_volume = remaining_volume * (current_tp['percentage'] / 100)
             
             pnl_pct = abs(current_price - entry) / entry * 100
@@ -572,6 +780,9 @@ class TPManager:
                 percentage=current_tp['percentage'],
                 pnl=pnl
             )
+            # DB ile aynı toplamlar - önbellekteki trade dict'i de güncel kalsın
+            trade['tp_count'] = next_tp_level
+            trade['cumulative_pct_closed'] = closed_pct + current_tp['percentage']
             
             logger.info(f"TP{next_tp_level} alındı: {trade['coin']} @ {current_price}, PNL={pnl:.4f}")
             
@@ -587,18 +798,6 @@ class TPManager:
             }
         
         return None
-    
-    def _get_executed_tps(self, trade_id: int) -> List[Dict]:
-        """Alınan TP'leri al"""
-        # DB'den çek
-        sql = "SELECT * FROM tp_records WHERE trade_id = %s ORDER BY tp_level"
-        try:
-            with self.db.get_connection() as conn:
-                with conn.cursor() as cur:
-                    cur.execute(sql, (trade_id,))
-                    return [dict(row) for row in cur.fetchall()]
-        except:
-            return []
 
 
 # Test
@@ -608,6 +807,8 @@ def test_strategy():
     print("Trading Stratejisi Testi")
     print("=" * 60)
     
+    from telegram_signals import TradingSignal
+    
     strategy = TradingStrategy()
     
     # Test sinyal
@@ -0,0 +1,70 @@
+"""
+Yardımcı Araçlar
+Opsiyonel bağımlılıklar ve paylaşılan rate limit için ortak yardımcılar
+"""
+import functools
+import threading
+import time
+from collections import deque
+
+# Numba opsiyonel - yoksa fonksiyonlar saf Python olarak çalışır
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """Numba yoksa dekoratörü etkisiz bırak"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+# orjson opsiyonel - yoksa standart json kullanılır (bytes ve str kabul eder)
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    import json
+    json_loads = json.loads
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter
+    Aynı bucket'ı paylaşan tüm nesneler/thread'ler ortak limite tabi olur
+    """
+    
+    def __init__(self, rate: float, capacity: int = 1):
+        """
+        Args:
+            rate: Saniyede üretilen token sayısı (0.5 = 2 saniyede 1 istek)
+            capacity: Aynı anda harcanabilecek maksimum token
+        """
+        self.capacity = capacity
+        self.window = capacity / rate  # Saniye - capacity kadar isteğin yayıldığı süre
+        self._stamps = deque()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Token alınana kadar bekle"""
+        with self._lock:
+            now = time.monotonic()
+            while self._stamps and now - self._stamps[0] >= self.window:
+                self._stamps.popleft()
+            
+            if len(self._stamps) >= self.capacity:
+                # En eski token süresi dolana kadar bekle (kilit tutulur, sıra korunur)
+                time.sleep(self.window - (now - self._stamps.popleft()))
+                now = time.monotonic()
+            
+            self._stamps.append(now)
+    
+    def limit(self, func):
+        """Her çağrıdan önce token alan dekoratör"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            self.acquire()
+            return func(*args, **kwargs)
+        return wrapper